@@ -4,21 +4,70 @@ WebRTC 音频处理模块的 Python ctypes 封装器。
 """
 
 import ctypes
+import functools
 import os
 import platform
+import struct
 import sys
+import threading
+from collections import deque
 from enum import IntEnum
 from pathlib import Path
-from typing import Optional
-
+from typing import Optional, Union
+
+import numpy as np
+
+# 可选的 Cython 加速层（见 _apm_cy.pyx），未编译时回退到 ctypes
+try:
+    from . import _apm_cy
+except ImportError:
+    _apm_cy = None
+
+# 平台信息（导入时获取一次；POSIX 上一次 uname 调用同时取得系统与架构）
+if hasattr(os, 'uname'):
+    _uname = os.uname()
+    _SYSTEM = _uname.sysname.lower()
+    _ARCH = _uname.machine.lower()
+    del _uname
+else:
+    _SYSTEM = platform.system().lower()
+    _ARCH = platform.machine().lower()
+
+def _read_cpu_flags() -> set:
+    """读取 CPU 特性标志（Linux /proc/cpuinfo，其他平台返回空集）。"""
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            for line in f:
+                # x86 为 "flags"，ARM 为 "Features"
+                key, _, value = line.partition(':')
+                if key.strip() in ('flags', 'Features'):
+                    return set(value.split())
+    except OSError:
+        pass
+    return set()
+
+def _simd_variants(arch: str) -> list:
+    """按优先级返回当前 CPU 可用的 SIMD 库变体后缀。"""
+    flags = _read_cpu_flags()
+    variants = []
+    if arch == 'x64':
+        if 'avx512f' in flags:
+            variants.append('avx512')
+        if 'avx2' in flags and 'fma' in flags:
+            variants.append('avx2')
+    elif arch == 'arm64':
+        if 'asimd' in flags:
+            variants.append('neon')
+    return variants
 
 # 平台特定的库加载
+@functools.lru_cache(maxsize=1)
 def _get_library_path() -> str:
     """获取平台特定的库路径。"""
     current_dir = Path(__file__).parent
 
-    system = platform.system().lower()
-    arch = platform.machine().lower()
+    system = _SYSTEM
+    arch = _ARCH
 
     # 标准化架构名称
     if arch in ['x86_64', 'amd64']:
@@ -29,7 +78,13 @@ def _get_library_path() -> str:
         arch = 'x86'
 
     if system == 'linux':
-        lib_path = current_dir / 'linux' / arch / 'libwebrtc_apm.so'
+        lib_dir = current_dir / 'linux' / arch
+        # 优先使用与 CPU 匹配的 SIMD 构建（libwebrtc_apm-avx2.so 等），缺失时回退通用构建
+        for variant in _simd_variants(arch):
+            simd_path = lib_dir / f'libwebrtc_apm-{variant}.so'
+            if simd_path.exists():
+                return str(simd_path)
+        lib_path = lib_dir / 'libwebrtc_apm.so'
     elif system == 'darwin':
         lib_path = current_dir / 'macos' / arch / 'libwebrtc_apm.dylib'
     elif system == 'windows':
@@ -42,20 +97,32 @@ def _get_library_path() -> str:
 
     return str(lib_path)
 
-# 延迟加载库（仅在macOS平台需要时加载）
+# 延迟加载库（首次创建 WebRTCAudioProcessing 时加载）
 _lib = None
 
+# 函数签名是否已初始化
+_signatures_initialized = False
+
+# 不透明句柄类型：指针宽度的整数，比 c_void_p 少一层装箱
+_Handle = ctypes.c_ssize_t
+
+# int16 缓冲区指针类型（仅构造一次）
+_ShortPtr = ctypes.POINTER(ctypes.c_short)
+
+# 逐帧处理函数（库加载后初始化）
+_c_process_stream = None
+_c_process_reverse_stream = None
+
+# 逐帧处理函数的 C 地址（供 Cython 加速层使用）
+_process_stream_addr = 0
+_process_reverse_stream_addr = 0
+
 def _ensure_library_loaded():
-    """确保库已加载（仅macOS平台）。"""
-    global _lib
+    """确保库已加载。
 
-    # 检查是否为macOS平台
-    system = platform.system().lower()
-    if system != 'darwin':
-        raise RuntimeError(
-            f"WebRTC APM library is only supported on macOS, current platform: {system}. "
-            f"Windows and Linux should use system-level AEC instead."
-        )
+    没有预编译库的平台/架构由 _get_library_path 抛出 FileNotFoundError。
+    """
+    global _lib
 
     # 如果已加载，直接返回
     if _lib is not None:
@@ -89,207 +156,368 @@ class ClippingPredictorMode(IntEnum):
     ADAPTIVE_STEP_CLIPPING_PEAK_PREDICTION = 1
     FIXED_STEP_CLIPPING_PEAK_PREDICTION = 2
 
-# 结构体
-class Pipeline(ctypes.Structure):
-    """音频处理管道配置。"""
-    _fields_ = [
-        ('maximum_internal_processing_rate', ctypes.c_int),
-        ('multi_channel_render', ctypes.c_bool),
-        ('multi_channel_capture', ctypes.c_bool),
-        ('capture_downmix_method', ctypes.c_int),
-    ]
-
-class PreAmplifier(ctypes.Structure):
-    """前置放大器配置。"""
-    _fields_ = [
-        ('enabled', ctypes.c_bool),
-        ('fixed_gain_factor', ctypes.c_float),
-    ]
-
-class AnalogMicGainEmulation(ctypes.Structure):
-    """模拟麦克风增益仿真配置。"""
-    _fields_ = [
-        ('enabled', ctypes.c_bool),
-        ('initial_level', ctypes.c_int),
-    ]
-
-class CaptureLevelAdjustment(ctypes.Structure):
-    """采集电平调整配置。"""
-    _fields_ = [
-        ('enabled', ctypes.c_bool),
-        ('pre_gain_factor', ctypes.c_float),
-        ('post_gain_factor', ctypes.c_float),
-        ('mic_gain_emulation', AnalogMicGainEmulation),
-    ]
-
-class HighPassFilter(ctypes.Structure):
-    """高通滤波器配置。"""
-    _fields_ = [
-        ('enabled', ctypes.c_bool),
-        ('apply_in_full_band', ctypes.c_bool),
-    ]
-
-class EchoCanceller(ctypes.Structure):
-    """回声消除器配置。"""
-    _fields_ = [
-        ('enabled', ctypes.c_bool),
-        ('mobile_mode', ctypes.c_bool),
-        ('export_linear_aec_output', ctypes.c_bool),
-        ('enforce_high_pass_filtering', ctypes.c_bool),
-    ]
-
-class NoiseSuppression(ctypes.Structure):
-    """噪声抑制配置。"""
-    _fields_ = [
-        ('enabled', ctypes.c_bool),
-        ('noise_level', ctypes.c_int),
-        ('analyze_linear_aec_output_when_available', ctypes.c_bool),
-    ]
-
-class TransientSuppression(ctypes.Structure):
-    """瞬态抑制配置。"""
-    _fields_ = [
-        ('enabled', ctypes.c_bool),
-    ]
-
-class ClippingPredictor(ctypes.Structure):
-    """削波预测器配置。"""
-    _fields_ = [
-        ('enabled', ctypes.c_bool),
-        ('predictor_mode', ctypes.c_int),
-        ('window_length', ctypes.c_int),
-        ('reference_window_length', ctypes.c_int),
-        ('reference_window_delay', ctypes.c_int),
-        ('clipping_threshold', ctypes.c_float),
-        ('crest_factor_margin', ctypes.c_float),
-        ('use_predicted_step', ctypes.c_bool),
-    ]
-
-class AnalogGainController(ctypes.Structure):
-    """模拟增益控制器配置。"""
-    _fields_ = [
-        ('enabled', ctypes.c_bool),
-        ('startup_min_volume', ctypes.c_int),
-        ('clipped_level_min', ctypes.c_int),
-        ('enable_digital_adaptive', ctypes.c_bool),
-        ('clipped_level_step', ctypes.c_int),
-        ('clipped_ratio_threshold', ctypes.c_float),
-        ('clipped_wait_frames', ctypes.c_int),
-        ('predictor', ClippingPredictor),
-    ]
-
-class GainController1(ctypes.Structure):
-    """AGC1 配置。"""
-    _fields_ = [
-        ('enabled', ctypes.c_bool),
-        ('controller_mode', ctypes.c_int),
-        ('target_level_dbfs', ctypes.c_int),
-        ('compression_gain_db', ctypes.c_int),
-        ('enable_limiter', ctypes.c_bool),
-        ('analog_controller', AnalogGainController),
-    ]
-
-class InputVolumeController(ctypes.Structure):
-    """输入音量控制器配置。"""
-    _fields_ = [
-        ('enabled', ctypes.c_bool),
-    ]
-
-class AdaptiveDigital(ctypes.Structure):
-    """自适应数字控制器配置。"""
-    _fields_ = [
-        ('enabled', ctypes.c_bool),
-        ('headroom_db', ctypes.c_float),
-        ('max_gain_db', ctypes.c_float),
-        ('initial_gain_db', ctypes.c_float),
-        ('max_gain_change_db_per_second', ctypes.c_float),
-        ('max_output_noise_level_dbfs', ctypes.c_float),
-    ]
-
-class FixedDigital(ctypes.Structure):
-    """固定数字控制器配置。"""
-    _fields_ = [
-        ('gain_db', ctypes.c_float),
-    ]
 
-class GainController2(ctypes.Structure):
-    """AGC2 配置。"""
-    _fields_ = [
-        ('enabled', ctypes.c_bool),
-        ('volume_controller', InputVolumeController),
-        ('adaptive_controller', AdaptiveDigital),
-        ('fixed_controller', FixedDigital),
-    ]
+# 结构体（延迟定义：首次使用时才创建 ctypes 类型）
+_STRUCT_NAMES = (
+    'Pipeline',
+    'PreAmplifier',
+    'AnalogMicGainEmulation',
+    'CaptureLevelAdjustment',
+    'HighPassFilter',
+    'EchoCanceller',
+    'NoiseSuppression',
+    'TransientSuppression',
+    'ClippingPredictor',
+    'AnalogGainController',
+    'GainController1',
+    'InputVolumeController',
+    'AdaptiveDigital',
+    'FixedDigital',
+    'GainController2',
+    'Config',
+)
+# 已定义的结构体 {名称: 类型}，由 _ensure_structures 填充
+_STRUCTS = {}
+
+def _define_structures() -> dict:
+    """定义所有 ctypes 结构体，返回 {名称: 类型}。"""
+
+    class Pipeline(ctypes.Structure):
+        """音频处理管道配置。"""
+        _fields_ = [
+            ('maximum_internal_processing_rate', ctypes.c_int),
+            ('multi_channel_render', ctypes.c_bool),
+            ('multi_channel_capture', ctypes.c_bool),
+            ('capture_downmix_method', ctypes.c_int),
+        ]
+
+    class PreAmplifier(ctypes.Structure):
+        """前置放大器配置。"""
+        _fields_ = [
+            ('enabled', ctypes.c_bool),
+            ('fixed_gain_factor', ctypes.c_float),
+        ]
+
+    class AnalogMicGainEmulation(ctypes.Structure):
+        """模拟麦克风增益仿真配置。"""
+        _fields_ = [
+            ('enabled', ctypes.c_bool),
+            ('initial_level', ctypes.c_int),
+        ]
+
+    class CaptureLevelAdjustment(ctypes.Structure):
+        """采集电平调整配置。"""
+        _fields_ = [
+            ('enabled', ctypes.c_bool),
+            ('pre_gain_factor', ctypes.c_float),
+            ('post_gain_factor', ctypes.c_float),
+            ('mic_gain_emulation', AnalogMicGainEmulation),
+        ]
+
+    class HighPassFilter(ctypes.Structure):
+        """高通滤波器配置。"""
+        _fields_ = [
+            ('enabled', ctypes.c_bool),
+            ('apply_in_full_band', ctypes.c_bool),
+        ]
+
+    class EchoCanceller(ctypes.Structure):
+        """回声消除器配置。"""
+        _fields_ = [
+            ('enabled', ctypes.c_bool),
+            ('mobile_mode', ctypes.c_bool),
+            ('export_linear_aec_output', ctypes.c_bool),
+            ('enforce_high_pass_filtering', ctypes.c_bool),
+        ]
+
+    class NoiseSuppression(ctypes.Structure):
+        """噪声抑制配置。"""
+        _fields_ = [
+            ('enabled', ctypes.c_bool),
+            ('noise_level', ctypes.c_int),
+            ('analyze_linear_aec_output_when_available', ctypes.c_bool),
+        ]
+
+    class TransientSuppression(ctypes.Structure):
+        """瞬态抑制配置。"""
+        _fields_ = [
+            ('enabled', ctypes.c_bool),
+        ]
+
+    class ClippingPredictor(ctypes.Structure):
+        """削波预测器配置。"""
+        _fields_ = [
+            ('enabled', ctypes.c_bool),
+            ('predictor_mode', ctypes.c_int),
+            ('window_length', ctypes.c_int),
+            ('reference_window_length', ctypes.c_int),
+            ('reference_window_delay', ctypes.c_int),
+            ('clipping_threshold', ctypes.c_float),
+            ('crest_factor_margin', ctypes.c_float),
+            ('use_predicted_step', ctypes.c_bool),
+        ]
+
+    class AnalogGainController(ctypes.Structure):
+        """模拟增益控制器配置。"""
+        _fields_ = [
+            ('enabled', ctypes.c_bool),
+            ('startup_min_volume', ctypes.c_int),
+            ('clipped_level_min', ctypes.c_int),
+            ('enable_digital_adaptive', ctypes.c_bool),
+            ('clipped_level_step', ctypes.c_int),
+            ('clipped_ratio_threshold', ctypes.c_float),
+            ('clipped_wait_frames', ctypes.c_int),
+            ('predictor', ClippingPredictor),
+        ]
+
+    class GainController1(ctypes.Structure):
+        """AGC1 配置。"""
+        _fields_ = [
+            ('enabled', ctypes.c_bool),
+            ('controller_mode', ctypes.c_int),
+            ('target_level_dbfs', ctypes.c_int),
+            ('compression_gain_db', ctypes.c_int),
+            ('enable_limiter', ctypes.c_bool),
+            ('analog_controller', AnalogGainController),
+        ]
+
+    class InputVolumeController(ctypes.Structure):
+        """输入音量控制器配置。"""
+        _fields_ = [
+            ('enabled', ctypes.c_bool),
+        ]
+
+    class AdaptiveDigital(ctypes.Structure):
+        """自适应数字控制器配置。"""
+        _fields_ = [
+            ('enabled', ctypes.c_bool),
+            ('headroom_db', ctypes.c_float),
+            ('max_gain_db', ctypes.c_float),
+            ('initial_gain_db', ctypes.c_float),
+            ('max_gain_change_db_per_second', ctypes.c_float),
+            ('max_output_noise_level_dbfs', ctypes.c_float),
+        ]
+
+    class FixedDigital(ctypes.Structure):
+        """固定数字控制器配置。"""
+        _fields_ = [
+            ('gain_db', ctypes.c_float),
+        ]
+
+    class GainController2(ctypes.Structure):
+        """AGC2 配置。"""
+        _fields_ = [
+            ('enabled', ctypes.c_bool),
+            ('volume_controller', InputVolumeController),
+            ('adaptive_controller', AdaptiveDigital),
+            ('fixed_controller', FixedDigital),
+        ]
+
+    class Config(ctypes.Structure):
+        """WebRTC 音频处理的主配置结构。"""
+        _fields_ = [
+            ('pipeline_config', Pipeline),
+            ('pre_amp', PreAmplifier),
+            ('level_adjustment', CaptureLevelAdjustment),
+            ('high_pass', HighPassFilter),
+            ('echo', EchoCanceller),
+            ('noise_suppress', NoiseSuppression),
+            ('transient_suppress', TransientSuppression),
+            ('gain_control1', GainController1),
+            ('gain_control2', GainController2),
+        ]
+
+    return {
+        'Pipeline': Pipeline,
+        'PreAmplifier': PreAmplifier,
+        'AnalogMicGainEmulation': AnalogMicGainEmulation,
+        'CaptureLevelAdjustment': CaptureLevelAdjustment,
+        'HighPassFilter': HighPassFilter,
+        'EchoCanceller': EchoCanceller,
+        'NoiseSuppression': NoiseSuppression,
+        'TransientSuppression': TransientSuppression,
+        'ClippingPredictor': ClippingPredictor,
+        'AnalogGainController': AnalogGainController,
+        'GainController1': GainController1,
+        'InputVolumeController': InputVolumeController,
+        'AdaptiveDigital': AdaptiveDigital,
+        'FixedDigital': FixedDigital,
+        'GainController2': GainController2,
+        'Config': Config,
+    }
+
+def _ensure_structures():
+    """确保结构体已定义，并生成默认配置原型。"""
+    global _CONFIG_LAYOUT, _CONFIG_FIELD_ORDER, _DEFAULT_CONFIG_BYTES
+    if _STRUCTS:
+        return
 
-class Config(ctypes.Structure):
-    """WebRTC 音频处理的主配置结构。"""
-    _fields_ = [
-        ('pipeline_config', Pipeline),
-        ('pre_amp', PreAmplifier),
-        ('level_adjustment', CaptureLevelAdjustment),
-        ('high_pass', HighPassFilter),
-        ('echo', EchoCanceller),
-        ('noise_suppress', NoiseSuppression),
-        ('transient_suppress', TransientSuppression),
-        ('gain_control1', GainController1),
-        ('gain_control2', GainController2),
-    ]
+    structs = _define_structures()
+    for struct_type in structs.values():
+        struct_type.__qualname__ = struct_type.__name__
+
+    _CONFIG_LAYOUT, _CONFIG_FIELD_ORDER = _build_flat_layout(structs['Config'])
+    # 默认配置原型的原始字节：一次 pack 生成，create_default_config 通过 memmove 复制
+    _DEFAULT_CONFIG_BYTES = _CONFIG_LAYOUT.pack(
+        *(_DEFAULT_CONFIG_VALUES[path] for path in _CONFIG_FIELD_ORDER)
+    )
+    _STRUCTS.update(structs)
+    globals().update(structs)
+
+def __getattr__(name: str):
+    """按需定义结构体，保持 `from libs.webrtc_apm import Config` 等用法可用。"""
+    if name in _STRUCT_NAMES:
+        _ensure_structures()
+        return _STRUCTS[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # 函数定义（延迟初始化）
 def _init_function_signatures():
     """初始化函数签名（仅在库加载后调用）。"""
-    global _lib
+    global _lib, _signatures_initialized
+    if _signatures_initialized:
+        return
     if _lib is None:
         raise RuntimeError("Library not loaded. Call _ensure_library_loaded() first.")
 
     _lib.WebRTC_APM_Create.argtypes = []
-    _lib.WebRTC_APM_Create.restype = ctypes.c_void_p
+    _lib.WebRTC_APM_Create.restype = _Handle
 
-    _lib.WebRTC_APM_Destroy.argtypes = [ctypes.c_void_p]
+    _lib.WebRTC_APM_Destroy.argtypes = [_Handle]
     _lib.WebRTC_APM_Destroy.restype = None
 
     _lib.WebRTC_APM_CreateStreamConfig.argtypes = [ctypes.c_int, ctypes.c_int]
-    _lib.WebRTC_APM_CreateStreamConfig.restype = ctypes.c_void_p
+    _lib.WebRTC_APM_CreateStreamConfig.restype = _Handle
 
-    _lib.WebRTC_APM_DestroyStreamConfig.argtypes = [ctypes.c_void_p]
+    _lib.WebRTC_APM_DestroyStreamConfig.argtypes = [_Handle]
     _lib.WebRTC_APM_DestroyStreamConfig.restype = ctypes.c_void_p
 
-    _lib.WebRTC_APM_ApplyConfig.argtypes = [ctypes.c_void_p, ctypes.POINTER(Config)]
-    _lib.WebRTC_APM_ApplyConfig.restype = ctypes.c_int
-
-    _lib.WebRTC_APM_ProcessReverseStream.argtypes = [
-        ctypes.c_void_p,
-        ctypes.POINTER(ctypes.c_short),
-        ctypes.c_void_p,
-        ctypes.c_void_p,
-        ctypes.POINTER(ctypes.c_short),
+    _lib.WebRTC_APM_ApplyConfig.argtypes = [
+        _Handle, ctypes.POINTER(_STRUCTS['Config'])
     ]
-    _lib.WebRTC_APM_ProcessReverseStream.restype = ctypes.c_int
-
-    _lib.WebRTC_APM_ProcessStream.argtypes = [
-        ctypes.c_void_p,
-        ctypes.POINTER(ctypes.c_short),
-        ctypes.c_void_p,
-        ctypes.c_void_p,
-        ctypes.POINTER(ctypes.c_short),
-    ]
-    _lib.WebRTC_APM_ProcessStream.restype = ctypes.c_int
+    _lib.WebRTC_APM_ApplyConfig.restype = ctypes.c_int
 
-    _lib.WebRTC_APM_SetStreamDelayMs.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    # 逐帧处理函数不设置 argtypes，跳过 ctypes 的逐次参数转换；
+    # 调用方必须传入已构造好的 _Handle 句柄与 c_short 指针/数组。
+    # CDLL 函数调用期间会释放 GIL，音频回调线程可在 APM 计算时继续运行
+    global _c_process_stream, _c_process_reverse_stream
+    _c_process_reverse_stream = _lib.WebRTC_APM_ProcessReverseStream
+    _c_process_reverse_stream.argtypes = None
+    _c_process_reverse_stream.restype = ctypes.c_int
+    _c_process_stream = _lib.WebRTC_APM_ProcessStream
+    _c_process_stream.argtypes = None
+    _c_process_stream.restype = ctypes.c_int
+
+    _lib.WebRTC_APM_SetStreamDelayMs.argtypes = [_Handle, ctypes.c_int]
     _lib.WebRTC_APM_SetStreamDelayMs.restype = None
 
+    global _process_stream_addr, _process_reverse_stream_addr
+    _process_stream_addr = ctypes.cast(_c_process_stream, ctypes.c_void_p).value
+    _process_reverse_stream_addr = ctypes.cast(
+        _c_process_reverse_stream, ctypes.c_void_p
+    ).value
+
+    _signatures_initialized = True
+
+def _check_int16_buffer(arr: np.ndarray) -> None:
+    """校验 numpy 缓冲区可作为 short* 传给 C 端（不依赖 assert，-O 下同样生效）。"""
+    if arr.dtype != np.int16:
+        raise TypeError(f"numpy buffers must be int16, got {arr.dtype}")
+    if not arr.flags['C_CONTIGUOUS']:
+        raise ValueError("numpy buffers must be C-contiguous")
+
+def _buffer_address(buf) -> int:
+    """获取 c_short 数组或 int16 numpy 数组的数据地址。"""
+    if isinstance(buf, np.ndarray):
+        _check_int16_buffer(buf)
+        return buf.ctypes.data
+    return ctypes.addressof(buf)
+
+class FramePool:
+    """int16 音频帧缓冲池，复用固定大小的 c_short 数组。
+
+    仅缓存标准采样率/声道数的帧，非标准尺寸按需正常分配。
+    """
+
+    STANDARD_SAMPLE_RATES = (8000, 16000, 32000, 48000)
+    STANDARD_CHANNELS = (1, 2)
+
+    def __init__(self, max_buffers: int = 4, frame_ms: int = 10):
+        self._max_buffers = max_buffers
+        self._frame_ms = frame_ms
+        self._standard_sizes = {
+            sr * ch * frame_ms // 1000
+            for sr in self.STANDARD_SAMPLE_RATES
+            for ch in self.STANDARD_CHANNELS
+        }
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, sample_rate: int, num_channels: int) -> ctypes.Array:
+        """获取一个清零的帧缓冲区。"""
+        size = sample_rate * num_channels * self._frame_ms // 1000
+        buf = None
+        with self._lock:
+            pool = self._pools.get(size)
+            if pool:
+                buf = pool.pop()
+        if buf is None:
+            return (ctypes.c_short * size)()
+        ctypes.memset(buf, 0, ctypes.sizeof(buf))
+        return buf
+
+    def release(self, buf: ctypes.Array) -> None:
+        """归还帧缓冲区，池满或尺寸非标准时直接丢弃。"""
+        size = len(buf)
+        if size not in self._standard_sizes:
+            return
+        with self._lock:
+            pool = self._pools.setdefault(size, deque())
+            if len(pool) < self._max_buffers:
+                pool.append(buf)
+
+
+# 全局帧缓冲池
+_frame_pool = FramePool()
+
 class WebRTCAudioProcessing:
     """WebRTC 音频处理的高级 Python 封装器。"""
 
+    __slots__ = (
+        '_handle',
+        '_handle_arg',
+        '_c_process_stream',
+        '_c_process_reverse',
+        '_set_delay',
+        '_frame_lens',
+        '_config_args',
+    )
+
     def __init__(self):
         """初始化音频处理模块。"""
-        # 确保库已加载（仅macOS）
+        # 先占位，保证初始化失败时 __del__ 仍可安全执行
+        self._handle = None
+
+        # 确保结构体与库已加载
+        _ensure_structures()
         _ensure_library_loaded()
         _init_function_signatures()
 
+        # 预绑定逐帧调用的 C 函数，避免每帧在 _lib 上查找属性
+        self._c_process_stream = _c_process_stream
+        self._c_process_reverse = _c_process_reverse_stream
+        self._set_delay = _lib.WebRTC_APM_SetStreamDelayMs
+
+        # 流配置句柄 -> 单帧（10ms）样本数，用于校验传入缓冲区的长度
+        self._frame_lens = {}
+
+        # 流配置句柄 -> 预构造的 _Handle 参数
+        self._config_args = {}
+
         self._handle = _lib.WebRTC_APM_Create()
         if not self._handle:
             raise RuntimeError("Failed to create WebRTC APM instance")
+        self._handle_arg = _Handle(self._handle)
     
     def __del__(self):
         """清理资源。"""
@@ -309,13 +537,24 @@ class WebRTCAudioProcessing:
         config_handle = _lib.WebRTC_APM_CreateStreamConfig(sample_rate, num_channels)
         if not config_handle:
             raise RuntimeError("Failed to create stream config")
+        self._config_args[config_handle] = _Handle(config_handle)
+        self._frame_lens[config_handle] = sample_rate * num_channels // 100
         return config_handle
     
     def destroy_stream_config(self, config_handle: int) -> None:
         """销毁流配置。"""
+        self._config_args.pop(config_handle, None)
+        self._frame_lens.pop(config_handle, None)
         _lib.WebRTC_APM_DestroyStreamConfig(config_handle)
     
-    def apply_config(self, config: Config) -> int:
+    def _config_arg(self, config_handle: int) -> ctypes.c_ssize_t:
+        """获取流配置句柄对应的 _Handle 参数（未登记的句柄临时构造）。"""
+        arg = self._config_args.get(config_handle)
+        if arg is None:
+            arg = _Handle(config_handle)
+        return arg
+    
+    def apply_config(self, config: ctypes.Structure) -> int:
         """将配置应用到音频处理模块。
         
         Args:
@@ -326,128 +565,378 @@ class WebRTCAudioProcessing:
         """
         return _lib.WebRTC_APM_ApplyConfig(self._handle, ctypes.byref(config))
     
-    def process_reverse_stream(self, src: ctypes.Array, src_config: int, 
-                             dest_config: int, dest: ctypes.Array) -> int:
+    def _check_frame(self, buf, config_handle: int) -> bool:
+        """校验数组缓冲区的长度，避免 C 端越界读写。
+
+        ctypes 指针（如 POINTER(c_short)、c_void_p）无长度信息，原样放行并返回 False；
+        dtype 与连续性由 Cython memoryview 或 ctypes 路径的转换处负责校验。
+        """
+        if isinstance(buf, np.ndarray):
+            size = buf.size
+        elif isinstance(buf, ctypes.Array):
+            size = len(buf)
+        else:
+            return False
+        frame_len = self._frame_lens.get(config_handle)
+        if frame_len is not None and size < frame_len:
+            raise ValueError(
+                f"buffer holds {size} samples, frame needs {frame_len}"
+            )
+        return True
+
+    def process_reverse_stream(self, src: Union[ctypes.Array, np.ndarray],
+                               src_config: int, dest_config: int,
+                               dest: Union[ctypes.Array, np.ndarray]) -> int:
         """处理反向流（渲染/播放音频）。
         
         Args:
-            src: 源音频缓冲区
+            src: 源音频缓冲区（c_short 数组、int16 numpy 数组或 short 指针）
             src_config: 源流配置句柄
             dest_config: 目标流配置句柄
-            dest: 目标音频缓冲区
+            dest: 目标音频缓冲区（c_short 数组、int16 numpy 数组或 short 指针）
             
         Returns:
             状态码（0表示成功）
         """
-        return _lib.WebRTC_APM_ProcessReverseStream(
-            self._handle, src, src_config, dest_config, dest
+        src_is_array = self._check_frame(src, src_config)
+        dest_is_array = self._check_frame(dest, dest_config)
+        if _apm_cy is not None and src_is_array and dest_is_array:
+            return _apm_cy.process(
+                _process_reverse_stream_addr, self._handle,
+                src, src_config, dest_config, dest
+            )
+        if isinstance(src, np.ndarray):
+            _check_int16_buffer(src)
+            src = src.ctypes.data_as(_ShortPtr)
+        if isinstance(dest, np.ndarray):
+            _check_int16_buffer(dest)
+            dest = dest.ctypes.data_as(_ShortPtr)
+        return self._c_process_reverse(
+            self._handle_arg, src,
+            self._config_arg(src_config), self._config_arg(dest_config), dest
         )
     
-    def process_stream(self, src: ctypes.Array, src_config: int,
-                      dest_config: int, dest: ctypes.Array) -> int:
+    def process_stream(self, src: Union[ctypes.Array, np.ndarray],
+                       src_config: int, dest_config: int,
+                       dest: Union[ctypes.Array, np.ndarray]) -> int:
         """处理采集流（麦克风音频）。
         
         Args:
-            src: 源音频缓冲区
+            src: 源音频缓冲区（c_short 数组、int16 numpy 数组或 short 指针）
             src_config: 源流配置句柄
             dest_config: 目标流配置句柄
-            dest: 目标音频缓冲区
+            dest: 目标音频缓冲区（c_short 数组、int16 numpy 数组或 short 指针）
             
         Returns:
             状态码（0表示成功）
         """
-        return _lib.WebRTC_APM_ProcessStream(
-            self._handle, src, src_config, dest_config, dest
+        src_is_array = self._check_frame(src, src_config)
+        dest_is_array = self._check_frame(dest, dest_config)
+        if _apm_cy is not None and src_is_array and dest_is_array:
+            return _apm_cy.process(
+                _process_stream_addr, self._handle,
+                src, src_config, dest_config, dest
+            )
+        if isinstance(src, np.ndarray):
+            _check_int16_buffer(src)
+            src = src.ctypes.data_as(_ShortPtr)
+        if isinstance(dest, np.ndarray):
+            _check_int16_buffer(dest)
+            dest = dest.ctypes.data_as(_ShortPtr)
+        return self._c_process_stream(
+            self._handle_arg, src,
+            self._config_arg(src_config), self._config_arg(dest_config), dest
         )
     
+    def _process_batch_fallback(self, c_fn, src, src_config: int,
+                                dest_config: int, dest, n_frames: int) -> int:
+        """ctypes 回退路径：按帧偏移指针逐帧调用。"""
+        total = len(src)
+        if n_frames <= 0 or total % n_frames != 0:
+            raise ValueError("source length must be a multiple of n_frames")
+        if len(dest) < total:
+            raise ValueError("destination buffer is smaller than source")
+
+        frame_bytes = total // n_frames * ctypes.sizeof(ctypes.c_short)
+        src_addr = _buffer_address(src)
+        dest_addr = _buffer_address(dest)
+        src_arg = self._config_arg(src_config)
+        dest_arg = self._config_arg(dest_config)
+        for i in range(n_frames):
+            offset = i * frame_bytes
+            result = c_fn(
+                self._handle_arg, ctypes.c_void_p(src_addr + offset),
+                src_arg, dest_arg, ctypes.c_void_p(dest_addr + offset)
+            )
+            if result != 0:
+                return result
+        return 0
+
+    def process_reverse_stream_batch(self, src: Union[ctypes.Array, np.ndarray],
+                                     src_config: int, dest_config: int,
+                                     dest: Union[ctypes.Array, np.ndarray],
+                                     n_frames: int) -> int:
+        """批量处理连续的多个10ms反向流帧。
+
+        Args:
+            src: 源音频缓冲区，长度为单帧长度的 n_frames 倍
+            src_config: 源流配置句柄
+            dest_config: 目标流配置句柄
+            dest: 目标音频缓冲区，长度不小于 src
+            n_frames: 帧数
+
+        Returns:
+            状态码（0表示成功，否则为首个失败帧的状态码）
+        """
+        if _apm_cy is not None:
+            return _apm_cy.process_batch(
+                _process_reverse_stream_addr, self._handle,
+                src, src_config, dest_config, dest, n_frames
+            )
+        return self._process_batch_fallback(
+            self._c_process_reverse, src, src_config, dest_config, dest, n_frames
+        )
+
+    def process_stream_batch(self, src: Union[ctypes.Array, np.ndarray],
+                             src_config: int, dest_config: int,
+                             dest: Union[ctypes.Array, np.ndarray],
+                             n_frames: int) -> int:
+        """批量处理连续的多个10ms采集流帧。
+
+        Args:
+            src: 源音频缓冲区，长度为单帧长度的 n_frames 倍
+            src_config: 源流配置句柄
+            dest_config: 目标流配置句柄
+            dest: 目标音频缓冲区，长度不小于 src
+            n_frames: 帧数
+
+        Returns:
+            状态码（0表示成功，否则为首个失败帧的状态码）
+        """
+        if _apm_cy is not None:
+            return _apm_cy.process_batch(
+                _process_stream_addr, self._handle,
+                src, src_config, dest_config, dest, n_frames
+            )
+        return self._process_batch_fallback(
+            self._c_process_stream, src, src_config, dest_config, dest, n_frames
+        )
+    
+    def process_duplex_batch(self, render_src: Union[ctypes.Array, np.ndarray],
+                             render_dest: Union[ctypes.Array, np.ndarray],
+                             capture_src: Union[ctypes.Array, np.ndarray],
+                             capture_dest: Union[ctypes.Array, np.ndarray],
+                             src_config: int, dest_config: int,
+                             n_frames: int) -> int:
+        """批量处理连续的多个10ms帧，每帧先处理反向流再处理采集流。
+
+        与逐帧调用 process_reverse_stream + process_stream 的顺序一致，
+        某一帧失败不会中断后续帧的处理。
+
+        Args:
+            render_src: 反向流（参考）源缓冲区，长度为单帧长度的 n_frames 倍
+            render_dest: 反向流目标缓冲区，长度不小于 render_src
+            capture_src: 采集流源缓冲区，长度与 render_src 相同
+            capture_dest: 采集流目标缓冲区，长度不小于 capture_src
+            src_config: 源流配置句柄
+            dest_config: 目标流配置句柄
+            n_frames: 帧数
+
+        Returns:
+            状态码（0表示全部成功，否则为第一个非零状态码）
+        """
+        if _apm_cy is not None:
+            return _apm_cy.process_duplex_batch(
+                _process_reverse_stream_addr, _process_stream_addr, self._handle,
+                render_src, render_dest, capture_src, capture_dest,
+                src_config, dest_config, n_frames
+            )
+
+        total = len(capture_src)
+        if n_frames <= 0 or total % n_frames != 0:
+            raise ValueError("source length must be a multiple of n_frames")
+        if len(render_src) != total:
+            raise ValueError("render and capture buffers differ in length")
+        if len(render_dest) < total or len(capture_dest) < total:
+            raise ValueError("destination buffer is smaller than source")
+
+        frame_bytes = total // n_frames * ctypes.sizeof(ctypes.c_short)
+        render_src_addr = _buffer_address(render_src)
+        render_dest_addr = _buffer_address(render_dest)
+        capture_src_addr = _buffer_address(capture_src)
+        capture_dest_addr = _buffer_address(capture_dest)
+        src_arg = self._config_arg(src_config)
+        dest_arg = self._config_arg(dest_config)
+        status = 0
+        for i in range(n_frames):
+            offset = i * frame_bytes
+            result = self._c_process_reverse(
+                self._handle_arg, ctypes.c_void_p(render_src_addr + offset),
+                src_arg, dest_arg, ctypes.c_void_p(render_dest_addr + offset)
+            )
+            if result != 0 and status == 0:
+                status = result
+            result = self._c_process_stream(
+                self._handle_arg, ctypes.c_void_p(capture_src_addr + offset),
+                src_arg, dest_arg, ctypes.c_void_p(capture_dest_addr + offset)
+            )
+            if result != 0 and status == 0:
+                status = result
+        return status
+
     def set_stream_delay_ms(self, delay_ms: int) -> None:
         """设置流延迟（毫秒）。
         
         Args:
             delay_ms: 延迟（毫秒）
         """
-        _lib.WebRTC_APM_SetStreamDelayMs(self._handle, delay_ms)
+        self._set_delay(self._handle_arg, delay_ms)
 
-def create_default_config() -> Config:
-    """创建默认设置的配置。"""
-    config = Config()
-    
+    def acquire_frame(self, sample_rate: int, num_channels: int) -> ctypes.Array:
+        """从帧缓冲池获取一个10ms的清零 c_short 缓冲区。
+
+        Args:
+            sample_rate: 采样率（Hz）
+            num_channels: 声道数
+
+        Returns:
+            长度为 sample_rate * num_channels // 100 的缓冲区
+        """
+        return _frame_pool.acquire(sample_rate, num_channels)
+
+    def release_frame(self, buf: ctypes.Array) -> None:
+        """将 acquire_frame 获取的缓冲区归还到帧缓冲池。"""
+        _frame_pool.release(buf)
+
+
+# 结构体字段到 struct 格式字符的映射
+_CTYPE_FORMATS = {
+    ctypes.c_int: 'i',
+    ctypes.c_bool: '?',
+    ctypes.c_float: 'f',
+}
+
+def _flatten_fields(struct_type, prefix: str = '', base: int = 0) -> dict:
+    """展开嵌套结构体，返回 {点分字段路径: (字节偏移, struct 格式字符)}。"""
+    fields = {}
+    for name, field_type in struct_type._fields_:
+        path = f"{prefix}{name}"
+        offset = base + getattr(struct_type, name).offset
+        if issubclass(field_type, ctypes.Structure):
+            fields.update(_flatten_fields(field_type, f"{path}.", offset))
+        else:
+            fields[path] = (offset, _CTYPE_FORMATS[field_type])
+    return fields
+
+def _build_flat_layout(struct_type):
+    """按 ctypes 实际偏移生成扁平 struct 布局（显式填充字节）。
+
+    Returns:
+        (struct.Struct, 按偏移排序的字段路径列表)
+    """
+    fields = _flatten_fields(struct_type)
+    order = sorted(fields, key=lambda path: fields[path][0])
+    fmt = ['=']
+    pos = 0
+    for path in order:
+        offset, code = fields[path]
+        if offset > pos:
+            fmt.append(f'{offset - pos}x')
+        fmt.append(code)
+        pos = offset + struct.calcsize('=' + code)
+    if ctypes.sizeof(struct_type) > pos:
+        fmt.append(f'{ctypes.sizeof(struct_type) - pos}x')
+    layout = struct.Struct(''.join(fmt))
+    if layout.size != ctypes.sizeof(struct_type):
+        raise RuntimeError(
+            f"Flat layout size mismatch for {struct_type.__name__}: "
+            f"{layout.size} != {ctypes.sizeof(struct_type)}"
+        )
+    return layout, order
+
+
+# 扁平布局与默认配置原型（由 _ensure_structures 生成）
+_CONFIG_LAYOUT = None
+_CONFIG_FIELD_ORDER = ()
+_DEFAULT_CONFIG_BYTES = b''
+
+# 默认配置（点分字段路径 -> 值）
+_DEFAULT_CONFIG_VALUES = {
     # 管道配置
-    config.pipeline_config.maximum_internal_processing_rate = 48000
-    config.pipeline_config.multi_channel_render = False
-    config.pipeline_config.multi_channel_capture = False
-    config.pipeline_config.capture_downmix_method = DownmixMethod.AVERAGE_CHANNELS
-    
+    'pipeline_config.maximum_internal_processing_rate': 48000,
+    'pipeline_config.multi_channel_render': False,
+    'pipeline_config.multi_channel_capture': False,
+    'pipeline_config.capture_downmix_method': DownmixMethod.AVERAGE_CHANNELS,
     # 前置放大器
-    config.pre_amp.enabled = False
-    config.pre_amp.fixed_gain_factor = 1.0
-    
+    'pre_amp.enabled': False,
+    'pre_amp.fixed_gain_factor': 1.0,
     # 电平调整
-    config.level_adjustment.enabled = False
-    config.level_adjustment.pre_gain_factor = 1.0
-    config.level_adjustment.post_gain_factor = 1.0
-    config.level_adjustment.mic_gain_emulation.enabled = False
-    config.level_adjustment.mic_gain_emulation.initial_level = 255
-    
+    'level_adjustment.enabled': False,
+    'level_adjustment.pre_gain_factor': 1.0,
+    'level_adjustment.post_gain_factor': 1.0,
+    'level_adjustment.mic_gain_emulation.enabled': False,
+    'level_adjustment.mic_gain_emulation.initial_level': 255,
     # 高通滤波器
-    config.high_pass.enabled = False
-    config.high_pass.apply_in_full_band = True
-    
+    'high_pass.enabled': False,
+    'high_pass.apply_in_full_band': True,
     # 回声消除器
-    config.echo.enabled = False
-    config.echo.mobile_mode = False
-    config.echo.export_linear_aec_output = False
-    config.echo.enforce_high_pass_filtering = True
-    
+    'echo.enabled': False,
+    'echo.mobile_mode': False,
+    'echo.export_linear_aec_output': False,
+    'echo.enforce_high_pass_filtering': True,
     # 噪声抑制
-    config.noise_suppress.enabled = False
-    config.noise_suppress.noise_level = NoiseSuppressionLevel.MODERATE
-    config.noise_suppress.analyze_linear_aec_output_when_available = False
-    
+    'noise_suppress.enabled': False,
+    'noise_suppress.noise_level': NoiseSuppressionLevel.MODERATE,
+    'noise_suppress.analyze_linear_aec_output_when_available': False,
     # 瞬态抑制
-    config.transient_suppress.enabled = False
-    
+    'transient_suppress.enabled': False,
     # AGC1
-    config.gain_control1.enabled = False
-    config.gain_control1.controller_mode = GainController1Mode.ADAPTIVE_ANALOG
-    config.gain_control1.target_level_dbfs = 3
-    config.gain_control1.compression_gain_db = 9
-    config.gain_control1.enable_limiter = True
-    
+    'gain_control1.enabled': False,
+    'gain_control1.controller_mode': GainController1Mode.ADAPTIVE_ANALOG,
+    'gain_control1.target_level_dbfs': 3,
+    'gain_control1.compression_gain_db': 9,
+    'gain_control1.enable_limiter': True,
     # AGC1 模拟控制器
-    config.gain_control1.analog_controller.enabled = True
-    config.gain_control1.analog_controller.startup_min_volume = 0
-    config.gain_control1.analog_controller.clipped_level_min = 70
-    config.gain_control1.analog_controller.enable_digital_adaptive = True
-    config.gain_control1.analog_controller.clipped_level_step = 15
-    config.gain_control1.analog_controller.clipped_ratio_threshold = 0.1
-    config.gain_control1.analog_controller.clipped_wait_frames = 300
-    
+    'gain_control1.analog_controller.enabled': True,
+    'gain_control1.analog_controller.startup_min_volume': 0,
+    'gain_control1.analog_controller.clipped_level_min': 70,
+    'gain_control1.analog_controller.enable_digital_adaptive': True,
+    'gain_control1.analog_controller.clipped_level_step': 15,
+    'gain_control1.analog_controller.clipped_ratio_threshold': 0.1,
+    'gain_control1.analog_controller.clipped_wait_frames': 300,
     # 削波预测器
-    config.gain_control1.analog_controller.predictor.enabled = False
-    config.gain_control1.analog_controller.predictor.predictor_mode = ClippingPredictorMode.CLIPPING_EVENT_PREDICTION
-    config.gain_control1.analog_controller.predictor.window_length = 5
-    config.gain_control1.analog_controller.predictor.reference_window_length = 5
-    config.gain_control1.analog_controller.predictor.reference_window_delay = 5
-    config.gain_control1.analog_controller.predictor.clipping_threshold = -1.0
-    config.gain_control1.analog_controller.predictor.crest_factor_margin = 3.0
-    config.gain_control1.analog_controller.predictor.use_predicted_step = True
-    
+    'gain_control1.analog_controller.predictor.enabled': False,
+    'gain_control1.analog_controller.predictor.predictor_mode': ClippingPredictorMode.CLIPPING_EVENT_PREDICTION,
+    'gain_control1.analog_controller.predictor.window_length': 5,
+    'gain_control1.analog_controller.predictor.reference_window_length': 5,
+    'gain_control1.analog_controller.predictor.reference_window_delay': 5,
+    'gain_control1.analog_controller.predictor.clipping_threshold': -1.0,
+    'gain_control1.analog_controller.predictor.crest_factor_margin': 3.0,
+    'gain_control1.analog_controller.predictor.use_predicted_step': True,
     # AGC2
-    config.gain_control2.enabled = False
-    config.gain_control2.volume_controller.enabled = False
-    config.gain_control2.adaptive_controller.enabled = False
-    config.gain_control2.adaptive_controller.headroom_db = 5.0
-    config.gain_control2.adaptive_controller.max_gain_db = 50.0
-    config.gain_control2.adaptive_controller.initial_gain_db = 15.0
-    config.gain_control2.adaptive_controller.max_gain_change_db_per_second = 6.0
-    config.gain_control2.adaptive_controller.max_output_noise_level_dbfs = -50.0
-    config.gain_control2.fixed_controller.gain_db = 0.0
-    
+    'gain_control2.enabled': False,
+    'gain_control2.volume_controller.enabled': False,
+    'gain_control2.adaptive_controller.enabled': False,
+    'gain_control2.adaptive_controller.headroom_db': 5.0,
+    'gain_control2.adaptive_controller.max_gain_db': 50.0,
+    'gain_control2.adaptive_controller.initial_gain_db': 15.0,
+    'gain_control2.adaptive_controller.max_gain_change_db_per_second': 6.0,
+    'gain_control2.adaptive_controller.max_output_noise_level_dbfs': -50.0,
+    'gain_control2.fixed_controller.gain_db': 0.0,
+}
+
+def create_default_config() -> ctypes.Structure:
+    """创建默认设置的配置。"""
+    _ensure_structures()
+    config = _STRUCTS['Config']()
+    ctypes.memmove(
+        ctypes.addressof(config), _DEFAULT_CONFIG_BYTES, len(_DEFAULT_CONFIG_BYTES)
+    )
     return config
 
 __all__ = [
     'WebRTCAudioProcessing',
+    'FramePool',
     'Config',
     'create_default_config',
     'DownmixMethod',
@@ -0,0 +1,148 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+WebRTC APM 逐帧处理的 Cython 加速层。
+
+通过函数指针直接调用 libwebrtc_apm 中的 ``WebRTC_APM_Process*``，
+绕过 ctypes/libffi 的逐次参数封送；函数地址由 ``__init__.py`` 在加载库后传入，
+因此编译本扩展无需头文件，也无需链接 libwebrtc_apm。
+
+编译方式：
+
+    cythonize -i libs/webrtc_apm/_apm_cy.pyx
+"""
+
+from libc.stdint cimport uintptr_t
+
+ctypedef int (*_apm_process_fn)(
+    void* handle,
+    const short* src,
+    void* src_config,
+    void* dest_config,
+    short* dest,
+) nogil
+
+
+cpdef int process(
+    uintptr_t fn,
+    uintptr_t handle,
+    const short[::1] src,
+    uintptr_t src_config,
+    uintptr_t dest_config,
+    short[::1] dest,
+):
+    """调用 ProcessStream / ProcessReverseStream，处理期间释放 GIL。
+
+    Args:
+        fn: C 函数地址
+        handle: APM 实例句柄
+        src: 源音频缓冲区（int16，C 连续）
+        src_config: 源流配置句柄
+        dest_config: 目标流配置句柄
+        dest: 目标音频缓冲区（int16，C 连续）
+
+    Returns:
+        状态码（0表示成功）
+    """
+    cdef _apm_process_fn c_fn = <_apm_process_fn>fn
+    cdef int result
+    with nogil:
+        result = c_fn(
+            <void*>handle,
+            &src[0],
+            <void*>src_config,
+            <void*>dest_config,
+            &dest[0],
+        )
+    return result
+
+
+cpdef int process_batch(
+    uintptr_t fn,
+    uintptr_t handle,
+    const short[::1] src,
+    uintptr_t src_config,
+    uintptr_t dest_config,
+    short[::1] dest,
+    Py_ssize_t n_frames,
+):
+    """在 C 层循环处理连续的 n_frames 个10ms帧，只跨越一次 Python/C 边界。
+
+    遇到非零状态码时立即停止并返回该状态码。
+    """
+    cdef _apm_process_fn c_fn = <_apm_process_fn>fn
+    cdef Py_ssize_t frame_len, i
+    cdef int result = 0
+
+    if n_frames <= 0 or src.shape[0] % n_frames != 0:
+        raise ValueError("source length must be a multiple of n_frames")
+    if dest.shape[0] < src.shape[0]:
+        raise ValueError("destination buffer is smaller than source")
+
+    frame_len = src.shape[0] // n_frames
+    with nogil:
+        for i in range(n_frames):
+            result = c_fn(
+                <void*>handle,
+                &src[i * frame_len],
+                <void*>src_config,
+                <void*>dest_config,
+                &dest[i * frame_len],
+            )
+            if result != 0:
+                break
+    return result
+
+
+cpdef int process_duplex_batch(
+    uintptr_t reverse_fn,
+    uintptr_t stream_fn,
+    uintptr_t handle,
+    const short[::1] render_src,
+    short[::1] render_dest,
+    const short[::1] capture_src,
+    short[::1] capture_dest,
+    uintptr_t src_config,
+    uintptr_t dest_config,
+    Py_ssize_t n_frames,
+):
+    """在 C 层逐帧交替处理参考流与采集流（先 ProcessReverseStream，再 ProcessStream）。
+
+    与回声消除的逐帧调用顺序一致，但 n_frames 帧只跨越一次 Python/C 边界。
+    某一帧处理失败不会中断后续帧，返回第一个非零状态码（全部成功时为0）。
+    """
+    cdef _apm_process_fn c_reverse = <_apm_process_fn>reverse_fn
+    cdef _apm_process_fn c_stream = <_apm_process_fn>stream_fn
+    cdef Py_ssize_t frame_len, offset, i
+    cdef int result, status = 0
+
+    if n_frames <= 0 or capture_src.shape[0] % n_frames != 0:
+        raise ValueError("source length must be a multiple of n_frames")
+    if render_src.shape[0] != capture_src.shape[0]:
+        raise ValueError("render and capture buffers differ in length")
+    if (render_dest.shape[0] < render_src.shape[0]
+            or capture_dest.shape[0] < capture_src.shape[0]):
+        raise ValueError("destination buffer is smaller than source")
+
+    frame_len = capture_src.shape[0] // n_frames
+    with nogil:
+        for i in range(n_frames):
+            offset = i * frame_len
+            result = c_reverse(
+                <void*>handle,
+                &render_src[offset],
+                <void*>src_config,
+                <void*>dest_config,
+                &render_dest[offset],
+            )
+            if result != 0 and status == 0:
+                status = result
+            result = c_stream(
+                <void*>handle,
+                &capture_src[offset],
+                <void*>src_config,
+                <void*>dest_config,
+                &capture_dest[offset],
+            )
+            if result != 0 and status == 0:
+                status = result
+    return status
@@ -1,28 +1,45 @@
-import argparse
 import asyncio
+import functools
+import os
 import signal
 import sys
+from types import SimpleNamespace
 
 from src.application import Application
 from src.utils.logging_config import get_logger, setup_logging
 
+# 在启动阶段导入激活模块，避免首次 await 时在事件循环中同步导入
+try:
+    from src.core.system_initializer import SystemInitializer
+except ImportError as e:
+    SystemInitializer = None
+    _system_initializer_import_error = e
+
 logger = get_logger(__name__)
 
 
-def parse_args():
+_ARG_CHOICES = {
+    "mode": ("gui", "cli"),
+    "protocol": ("mqtt", "websocket"),
+}
+
+
+def _build_parser():
     """
-    解析命令行参数.
+    构建完整的 argparse 解析器（仅用于 --help 和参数错误提示）.
     """
+    import argparse
+
     parser = argparse.ArgumentParser(description="小智Ai客户端")
     parser.add_argument(
         "--mode",
-        choices=["gui", "cli"],
+        choices=list(_ARG_CHOICES["mode"]),
         default="cli",
         help="运行模式：gui(图形界面) 或 cli(命令行)",
     )
     parser.add_argument(
         "--protocol",
-        choices=["mqtt", "websocket"],
+        choices=list(_ARG_CHOICES["protocol"]),
         default="websocket",
         help="通信协议：mqtt 或 websocket",
     )
@@ -31,7 +48,59 @@ def parse_args():
         action="store_true",
         help="跳过激活流程，直接启动应用（仅用于调试）",
     )
-    return parser.parse_args()
+    return parser
+
+
+def parse_args(argv=None):
+    """
+    解析命令行参数.
+
+    常见情况下直接扫描 sys.argv，避免构建 argparse 解析器；
+    遇到 --help 或无法识别/非法的参数时回退到 argparse 以保持原有提示与报错行为.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    args = SimpleNamespace(mode="cli", protocol="websocket", skip_activation=False)
+
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "--skip-activation":
+            args.skip_activation = True
+            i += 1
+            continue
+
+        name, sep, value = arg.partition("=")
+        key = name[2:] if name.startswith("--") else None
+        if key not in _ARG_CHOICES:
+            return _build_parser().parse_args(argv)
+        if not sep:
+            if i + 1 >= len(argv):
+                return _build_parser().parse_args(argv)
+            value = argv[i + 1]
+            i += 1
+        if value not in _ARG_CHOICES[key]:
+            return _build_parser().parse_args(argv)
+        setattr(args, key, value)
+        i += 1
+
+    return args
+
+
+@functools.lru_cache(maxsize=1)
+def _detect_display_server() -> str:
+    """检测当前显示服务器类型（结果缓存）.
+
+    Returns:
+        str: "wayland"、"x11" 或 "other"
+    """
+    if (
+        os.environ.get("WAYLAND_DISPLAY")
+        or os.environ.get("XDG_SESSION_TYPE") == "wayland"
+    ):
+        return "wayland"
+    if os.environ.get("DISPLAY"):
+        return "x11"
+    return "other"
 
 
 async def handle_activation(mode: str) -> bool:
@@ -44,7 +113,8 @@ async def handle_activation(mode: str) -> bool:
         bool: 激活是否成功
     """
     try:
-        from src.core.system_initializer import SystemInitializer
+        if SystemInitializer is None:
+            raise _system_initializer_import_error
 
         logger.info("开始设备激活流程检查...")
 
@@ -86,14 +156,7 @@ if __name__ == "__main__":
         setup_logging()
 
         # 检测Wayland环境并设置Qt平台插件配置
-        import os
-
-        is_wayland = (
-            os.environ.get("WAYLAND_DISPLAY")
-            or os.environ.get("XDG_SESSION_TYPE") == "wayland"
-        )
-
-        if args.mode == "gui" and is_wayland:
+        if args.mode == "gui" and _detect_display_server() == "wayland":
             # 在Wayland环境下，确保Qt使用正确的平台插件
             if "QT_QPA_PLATFORM" not in os.environ:
                 # 优先使用wayland插件，失败则回退到xcb（X11兼容层）
@@ -127,7 +190,9 @@ if __name__ == "__main__":
                 logger.error(f"GUI模式需要qasync和PyQt5库: {e}")
                 sys.exit(1)
 
-            qt_app = QApplication.instance() or QApplication(sys.argv)
+            qt_app = QApplication.instance()
+            if qt_app is None:
+                qt_app = QApplication(sys.argv)
 
             loop = qasync.QEventLoop(qt_app)
             asyncio.set_event_loop(loop)
@@ -5,19 +5,35 @@
 
 import argparse
 import asyncio
+import bisect
+import heapq
+import itertools
 import sys
 from datetime import datetime, timedelta
 from pathlib import Path
 
-from src.mcp.tools.calendar import get_calendar_manager
-from src.utils.logging_config import get_logger
-
 # 添加项目根目录到Python路径 - 必须在导入src模块之前
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+from src.utils.logging_config import get_logger  # noqa: E402
+
 logger = get_logger(__name__)
 
+_WEEKDAYS = ("周一", "周二", "周三", "周四", "周五", "周六", "周日")
+
+HELP_TEXT = """
+==================================================
+💡 使用帮助:
+  python scripts/calendar_query.py today      # 查看今日日程
+  python scripts/calendar_query.py tomorrow   # 查看明日日程
+  python scripts/calendar_query.py week       # 查看本周日程
+  python scripts/calendar_query.py upcoming --hours 48  # 查看未来48小时
+  python scripts/calendar_query.py category --category 工作  # 查看工作分类
+  python scripts/calendar_query.py all        # 查看所有日程
+  python scripts/calendar_query.py search --keyword 开发  # 搜索日程
+"""
+
 
 class CalendarQueryScript:
     """
@@ -25,17 +41,29 @@ class CalendarQueryScript:
     """
 
     def __init__(self):
+        # 延迟导入日程管理模块，避免 --help 等场景加载整个MCP子系统
+        from src.mcp.tools.calendar import get_calendar_manager
+
         self.manager = get_calendar_manager()
 
-    def format_event_display(self, event, show_details=True):
+    def format_event_display(self, event, *, now=None, show_details=True):
         """
         格式化事件显示.
+
+        Args:
+            event: 日程事件
+            now: 当前时间，批量格式化时由调用方统一传入，避免逐个事件取时间
+            show_details: 是否显示详细信息
         """
-        start_dt = datetime.fromisoformat(event.start_time)
-        end_dt = datetime.fromisoformat(event.end_time)
+        start_dt = event.start_dt
+        end_dt = event.end_dt
 
         # 基本信息
-        time_str = f"{start_dt.strftime('%m/%d %H:%M')} - {end_dt.strftime('%H:%M')}"
+        time_str = (
+            f"{start_dt.month:02d}/{start_dt.day:02d} "
+            f"{start_dt.hour:02d}:{start_dt.minute:02d} - "
+            f"{end_dt.hour:02d}:{end_dt.minute:02d}"
+        )
         basic_info = f"📅 {time_str} | 【{event.category}】{event.title}"
 
         if not show_details:
@@ -55,12 +83,13 @@ class CalendarQueryScript:
                 details.append("   ⏳ 提醒状态: 待发送")
 
         # 时间距离
-        now = datetime.now()
+        if now is None:
+            now = datetime.now()
         time_diff = start_dt - now
         if time_diff.total_seconds() > 0:
-            days = time_diff.days
-            hours = int(time_diff.seconds // 3600)
-            minutes = int((time_diff.seconds % 3600) // 60)
+            days, remainder = divmod(int(time_diff.total_seconds()), 86400)
+            hours, remainder = divmod(remainder, 3600)
+            minutes = remainder // 60
 
             time_until_parts = []
             if days > 0:
@@ -83,12 +112,29 @@ class CalendarQueryScript:
             return basic_info + "\n" + "\n".join(details)
         return basic_info
 
+    def _format_event_list(self, events, now=None):
+        """
+        格式化带序号的事件列表，事件之间空一行.
+        """
+        if now is None:
+            now = datetime.now()
+        return "\n\n".join(
+            f"{i}. {self.format_event_display(event, now=now)}"
+            for i, event in enumerate(events, 1)
+        )
+
+    @staticmethod
+    def _write(lines):
+        """
+        一次性输出缓冲的所有行.
+        """
+        sys.stdout.write("\n".join(lines) + "\n")
+
     async def query_today(self):
         """
         查询今日日程.
         """
-        print("📅 今日日程安排")
-        print("=" * 50)
+        out = ["📅 今日日程安排", "=" * 50]
 
         now = datetime.now()
         today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -99,21 +145,17 @@ class CalendarQueryScript:
         )
 
         if not events:
-            print("🎉 今天没有安排任何日程")
-            return
-
-        print(f"📊 共有 {len(events)} 个日程:\n")
-        for i, event in enumerate(events, 1):
-            print(f"{i}. {self.format_event_display(event)}")
-            if i < len(events):
-                print()
+            out.append("🎉 今天没有安排任何日程")
+        else:
+            out.append(f"📊 共有 {len(events)} 个日程:\n")
+            out.append(self._format_event_list(events, now))
+        self._write(out)
 
     async def query_tomorrow(self):
         """
         查询明日日程.
         """
-        print("📅 明日日程安排")
-        print("=" * 50)
+        out = ["📅 明日日程安排", "=" * 50]
 
         now = datetime.now()
         tomorrow_start = (now + timedelta(days=1)).replace(
@@ -126,21 +168,17 @@ class CalendarQueryScript:
         )
 
         if not events:
-            print("🎉 明天没有安排任何日程")
-            return
-
-        print(f"📊 共有 {len(events)} 个日程:\n")
-        for i, event in enumerate(events, 1):
-            print(f"{i}. {self.format_event_display(event)}")
-            if i < len(events):
-                print()
+            out.append("🎉 明天没有安排任何日程")
+        else:
+            out.append(f"📊 共有 {len(events)} 个日程:\n")
+            out.append(self._format_event_list(events, now))
+        self._write(out)
 
     async def query_week(self):
         """
         查询本周日程.
         """
-        print("📅 本周日程安排")
-        print("=" * 50)
+        out = ["📅 本周日程安排", "=" * 50]
 
         now = datetime.now()
         # 本周一
@@ -155,36 +193,30 @@ class CalendarQueryScript:
         )
 
         if not events:
-            print("🎉 本周没有安排任何日程")
+            out.append("🎉 本周没有安排任何日程")
+            self._write(out)
             return
 
-        print(f"📊 共有 {len(events)} 个日程:\n")
-
-        # 按日期分组显示
-        events_by_date = {}
-        for event in events:
-            event_date = datetime.fromisoformat(event.start_time).date()
-            if event_date not in events_by_date:
-                events_by_date[event_date] = []
-            events_by_date[event_date].append(event)
+        out.append(f"📊 共有 {len(events)} 个日程:\n")
 
-        for date in sorted(events_by_date.keys()):
-            weekday = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"][
-                date.weekday()
-            ]
-            print(f"📆 {date.strftime('%m月%d日')} ({weekday})")
-            print("-" * 30)
+        # 按日期分组显示（事件已按开始时间排序，一次遍历即可分组）
+        for date, day_events in itertools.groupby(
+            events, key=lambda e: e.start_dt.date()
+        ):
+            weekday = _WEEKDAYS[date.weekday()]
+            out.append(f"📆 {date.month:02d}月{date.day:02d}日 ({weekday})")
+            out.append("-" * 30)
 
-            for event in events_by_date[date]:
-                print(f"  {self.format_event_display(event, show_details=False)}")
-            print()
+            for event in day_events:
+                out.append(f"  {self.format_event_display(event, show_details=False)}")
+            out.append("")
+        self._write(out)
 
     async def query_upcoming(self, hours=24):
         """
         查询即将到来的日程.
         """
-        print(f"📅 未来 {hours} 小时内的日程")
-        print("=" * 50)
+        out = [f"📅 未来 {hours} 小时内的日程", "=" * 50]
 
         now = datetime.now()
         end_time = now + timedelta(hours=hours)
@@ -194,136 +226,105 @@ class CalendarQueryScript:
         )
 
         if not events:
-            print(f"🎉 未来 {hours} 小时内没有安排任何日程")
-            return
-
-        print(f"📊 共有 {len(events)} 个日程:\n")
-        for i, event in enumerate(events, 1):
-            print(f"{i}. {self.format_event_display(event)}")
-            if i < len(events):
-                print()
+            out.append(f"🎉 未来 {hours} 小时内没有安排任何日程")
+        else:
+            out.append(f"📊 共有 {len(events)} 个日程:\n")
+            out.append(self._format_event_list(events, now))
+        self._write(out)
 
     async def query_by_category(self, category=None):
         """
         按分类查询日程.
         """
         if category:
-            print(f"📅 【{category}】分类的日程")
-            print("=" * 50)
+            out = [f"📅 【{category}】分类的日程", "=" * 50]
 
             events = self.manager.get_events(category=category)
 
             if not events:
-                print(f"🎉 【{category}】分类下没有任何日程")
-                return
-
-            print(f"📊 共有 {len(events)} 个日程:\n")
-            for i, event in enumerate(events, 1):
-                print(f"{i}. {self.format_event_display(event)}")
-                if i < len(events):
-                    print()
+                out.append(f"🎉 【{category}】分类下没有任何日程")
+            else:
+                out.append(f"📊 共有 {len(events)} 个日程:\n")
+                out.append(self._format_event_list(events))
         else:
-            print("📅 所有分类统计")
-            print("=" * 50)
+            out = ["📅 所有分类统计", "=" * 50]
 
             categories = self.manager.get_categories()
 
             if not categories:
-                print("🎉 暂无任何分类")
-                return
+                out.append("🎉 暂无任何分类")
+            else:
+                # 一次聚合查询统计所有分类的事件数量
+                counts = self.manager.get_category_counts()
 
-            print("📊 分类列表:")
-            for i, cat in enumerate(categories, 1):
-                # 统计每个分类的事件数量
-                events = self.manager.get_events(category=cat)
-                print(f"{i}. 【{cat}】- {len(events)} 个日程")
+                out.append("📊 分类列表:")
+                for i, cat in enumerate(categories, 1):
+                    out.append(f"{i}. 【{cat}】- {counts.get(cat, 0)} 个日程")
+        self._write(out)
 
     async def query_all(self):
         """
         查询所有日程.
         """
-        print("📅 所有日程安排")
-        print("=" * 50)
+        out = ["📅 所有日程安排", "=" * 50]
 
         events = self.manager.get_events()
 
         if not events:
-            print("🎉 暂无任何日程安排")
+            out.append("🎉 暂无任何日程安排")
+            self._write(out)
             return
 
-        print(f"📊 总共有 {len(events)} 个日程:\n")
+        out.append(f"📊 总共有 {len(events)} 个日程:\n")
 
-        # 按时间排序并分组显示
+        # 事件已按开始时间排序，二分定位“现在”即可划分已开始/未开始的事件
         now = datetime.now()
-        past_events = []
-        current_events = []
-        future_events = []
-
-        for event in events:
-            start_dt = datetime.fromisoformat(event.start_time)
-            end_dt = datetime.fromisoformat(event.end_time)
-
-            if end_dt < now:
-                past_events.append(event)
-            elif start_dt <= now <= end_dt:
-                current_events.append(event)
-            else:
-                future_events.append(event)
+        pivot = bisect.bisect_right([event.start_dt for event in events], now)
+        started_events = events[:pivot]
+        future_events = events[pivot:]
+        past_events = [event for event in started_events if event.end_dt < now]
+        current_events = [event for event in started_events if event.end_dt >= now]
 
         # 显示正在进行的事件
         if current_events:
-            print("🔴 正在进行中:")
+            out.append("🔴 正在进行中:")
             for event in current_events:
-                print(f"  {self.format_event_display(event, show_details=False)}")
-            print()
+                out.append(f"  {self.format_event_display(event, show_details=False)}")
+            out.append("")
 
         # 显示未来事件
         if future_events:
-            print("⏳ 即将到来:")
+            out.append("⏳ 即将到来:")
             for event in future_events[:5]:  # 只显示前5个
-                print(f"  {self.format_event_display(event, show_details=False)}")
+                out.append(f"  {self.format_event_display(event, show_details=False)}")
             if len(future_events) > 5:
-                print(f"  ... 还有 {len(future_events) - 5} 个日程")
-            print()
+                out.append(f"  ... 还有 {len(future_events) - 5} 个日程")
+            out.append("")
 
         # 显示最近的过去事件
         if past_events:
-            recent_past = sorted(past_events, key=lambda e: e.start_time, reverse=True)[
-                :3
-            ]
-            print("✅ 最近完成:")
+            recent_past = heapq.nlargest(3, past_events, key=lambda e: e.start_time)
+            out.append("✅ 最近完成:")
             for event in recent_past:
-                print(f"  {self.format_event_display(event, show_details=False)}")
+                out.append(f"  {self.format_event_display(event, show_details=False)}")
             if len(past_events) > 3:
-                print(f"  ... 还有 {len(past_events) - 3} 个已完成的日程")
+                out.append(f"  ... 还有 {len(past_events) - 3} 个已完成的日程")
+        self._write(out)
 
     async def search_events(self, keyword):
         """
         搜索日程.
         """
-        print(f"🔍 搜索包含 '{keyword}' 的日程")
-        print("=" * 50)
+        out = [f"🔍 搜索包含 '{keyword}' 的日程", "=" * 50]
 
-        all_events = self.manager.get_events()
-        matched_events = []
-
-        for event in all_events:
-            if (
-                keyword.lower() in event.title.lower()
-                or keyword.lower() in event.description.lower()
-                or keyword.lower() in event.category.lower()
-            ):
-                matched_events.append(event)
+        matched_events = self.manager.search(keyword)
 
         if not matched_events:
-            print(f"🎉 没有找到包含 '{keyword}' 的日程")
-            return
-
-        print(f"📊 找到 {len(matched_events)} 个匹配的日程:\n")
-        for i, event in enumerate(matched_events, 1):
-            print(f"{i}. {self.format_event_display(event)}")
-            if i < len(matched_events):
-                print()
+            out.append(f"🎉 没有找到包含 '{keyword}' 的日程")
+        else:
+            out.append(f"📊 找到 {len(matched_events)} 个匹配的日程:\n")
+            out.append(self._format_event_list(matched_events))
+        self._write(out)
 
 
 async def main():
@@ -365,19 +366,7 @@ async def main():
                 return
             await script.search_events(args.keyword)
 
-        print("\n" + "=" * 50)
-        print("💡 使用帮助:")
-        print("  python scripts/calendar_query.py today      # 查看今日日程")
-        print("  python scripts/calendar_query.py tomorrow   # 查看明日日程")
-        print("  python scripts/calendar_query.py week       # 查看本周日程")
-        print(
-            "  python scripts/calendar_query.py upcoming --hours 48  # 查看未来48小时"
-        )
-        print(
-            "  python scripts/calendar_query.py category --category 工作  # 查看工作分类"
-        )
-        print("  python scripts/calendar_query.py all        # 查看所有日程")
-        print("  python scripts/calendar_query.py search --keyword 开发  # 搜索日程")
+        sys.stdout.write(HELP_TEXT)
 
     except Exception as e:
         logger.error(f"查询日程失败: {e}", exc_info=True)
@@ -6,17 +6,16 @@ import json
 import logging
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-import cv2
-
-# 导入ConfigManager类
-from src.utils.config_manager import ConfigManager
-
 # 添加项目根目录到系统路径，以便导入src中的模块
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
+# 导入ConfigManager类
+from src.utils.config_manager import ConfigManager  # noqa: E402
+
 # 设置日志记录
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -24,33 +23,40 @@ logging.basicConfig(
 logger = logging.getLogger("CameraScanner")
 
 
+# 并发探测摄像头索引的线程数
+PROBE_WORKERS = 4
+
+# 额外探测的常用分辨率；每次 set 都可能触发驱动重新初始化（100-500ms），
+# 因此只保留少量候选，而不是遍历所有标准分辨率
+PROBE_RESOLUTIONS = (
+    (1280, 720),  # HD
+    (1920, 1080),  # Full HD
+)
+
+
 def get_camera_capabilities(cam):
     """
     获取摄像头的参数和能力.
     """
+    import cv2
+
     capabilities = {}
 
-    # 获取可用的分辨率
-    standard_resolutions = [
-        (640, 480),  # VGA
-        (800, 600),  # SVGA
-        (1024, 768),  # XGA
-        (1280, 720),  # HD
-        (1280, 960),  # 4:3 HD
-        (1920, 1080),  # Full HD
-        (2560, 1440),  # QHD
-        (3840, 2160),  # 4K UHD
-    ]
-
-    supported_resolutions = []
+    # 一次性读取当前参数
     original_width = int(cam.get(cv2.CAP_PROP_FRAME_WIDTH))
     original_height = int(cam.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = int(cam.get(cv2.CAP_PROP_FPS))
 
     # 记录原始分辨率
     capabilities["default_resolution"] = (original_width, original_height)
 
-    # 测试标准分辨率
-    for width, height in standard_resolutions:
+    # 默认分辨率必然可用，只需探测其余候选
+    supported_resolutions = [(original_width, original_height)]
+    probed = False
+    for width, height in PROBE_RESOLUTIONS:
+        if (width, height) == (original_width, original_height):
+            continue
+        probed = True
         cam.set(cv2.CAP_PROP_FRAME_WIDTH, width)
         cam.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
         actual_width = int(cam.get(cv2.CAP_PROP_FRAME_WIDTH))
@@ -61,13 +67,13 @@ def get_camera_capabilities(cam):
             supported_resolutions.append((width, height))
 
     # 恢复原始分辨率
-    cam.set(cv2.CAP_PROP_FRAME_WIDTH, original_width)
-    cam.set(cv2.CAP_PROP_FRAME_HEIGHT, original_height)
+    if probed:
+        cam.set(cv2.CAP_PROP_FRAME_WIDTH, original_width)
+        cam.set(cv2.CAP_PROP_FRAME_HEIGHT, original_height)
 
-    capabilities["supported_resolutions"] = supported_resolutions
+    capabilities["supported_resolutions"] = sorted(supported_resolutions)
 
     # 获取帧率
-    fps = int(cam.get(cv2.CAP_PROP_FPS))
     capabilities["fps"] = fps if fps > 0 else 30  # 默认为30fps
 
     # 获取后端名称
@@ -77,10 +83,67 @@ def get_camera_capabilities(cam):
     return capabilities
 
 
+def _list_cameras_linux():
+    """
+    从 /sys/class/video4linux 读取系统实际存在的视频设备索引.
+
+    Returns:
+        排序后的索引列表；非Linux或该目录不存在时返回 None
+    """
+    v4l_dir = Path("/sys/class/video4linux")
+    if not v4l_dir.is_dir():
+        return None
+
+    indices = []
+    for node in v4l_dir.glob("video*"):
+        suffix = node.name[len("video") :]
+        if suffix.isdigit():
+            indices.append(int(suffix))
+    return sorted(indices)
+
+
+def _probe_camera(index):
+    """
+    打开并探测单个摄像头索引.
+
+    探测完成即释放设备：多个 UVC 摄像头同时保持打开可能因 USB 带宽不足而失败。
+
+    Returns:
+        无法打开时返回 None；否则返回 (device_name, capabilities)，
+        能打开但读不到画面时 capabilities 为 None
+    """
+    import cv2
+
+    cap = cv2.VideoCapture(index)
+    try:
+        if not cap.isOpened():
+            return None
+
+        # 获取摄像头信息
+        device_name = f"Camera {index}"
+        try:
+            # 在某些系统上可能可以获取设备名称
+            device_name = cap.getBackendName() + f" Camera {index}"
+        except Exception as e:
+            logger.warning(f"获取设备{index}名称失败: {e}")
+
+        # 读取一帧以确保摄像头正常工作
+        ret, _ = cap.read()
+        if not ret:
+            return device_name, None
+
+        # 获取摄像头能力
+        return device_name, get_camera_capabilities(cap)
+    finally:
+        cap.release()
+
+
 def detect_cameras():
     """
     检测并列出所有可用摄像头.
     """
+    import cv2
+
     print("\n===== 摄像头设备检测 =====\n")
 
     # 获取ConfigManager实例
@@ -107,65 +170,67 @@ def detect_cameras():
     # 存储找到的设备
     camera_devices = []
 
-    # 尝试打开多个摄像头索引
-    max_cameras_to_check = 10  # 最多检查10个摄像头索引
-
-    for i in range(max_cameras_to_check):
-        try:
-            # 尝试打开摄像头
-            cap = cv2.VideoCapture(i)
+    # 优先使用系统枚举到的设备索引，无法枚举时再盲扫多个索引
+    camera_indices = _list_cameras_linux()
+    if camera_indices is None:
+        max_cameras_to_check = 10  # 最多检查10个摄像头索引
+        camera_indices = list(range(max_cameras_to_check))
 
-            if cap.isOpened():
-                # 获取摄像头信息
-                device_name = f"Camera {i}"
-                try:
-                    # 在某些系统上可能可以获取设备名称
-                    device_name = cap.getBackendName() + f" Camera {i}"
-                except Exception as e:
-                    logger.warning(f"获取设备{i}名称失败: {e}")
+    # 并发打开各索引：打开设备主要耗在驱动I/O等待上，彼此互不依赖
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+        futures = [executor.submit(_probe_camera, i) for i in camera_indices]
 
-                # 读取一帧以确保摄像头正常工作
-                ret, frame = cap.read()
-                if not ret:
-                    print(f"设备 {i}: 打开成功但无法读取画面，跳过")
-                    cap.release()
-                    continue
-
-                # 获取摄像头能力
-                capabilities = get_camera_capabilities(cap)
+    # 按索引顺序在主线程输出、测试和预览（imshow 必须在主线程调用）
+    for i, future in zip(camera_indices, futures):
+        try:
+            result = future.result()
+            if result is None:
+                continue
+
+            device_name, capabilities = result
+            if capabilities is None:
+                print(f"设备 {i}: 打开成功但无法读取画面，跳过")
+                continue
+
+            # 打印设备信息
+            width, height = capabilities["default_resolution"]
+            resolutions_str = ", ".join(
+                [f"{w}x{h}" for w, h in capabilities["supported_resolutions"]]
+            )
 
-                # 打印设备信息
-                width, height = capabilities["default_resolution"]
-                resolutions_str = ", ".join(
-                    [f"{w}x{h}" for w, h in capabilities["supported_resolutions"]]
-                )
+            print(f"设备 {i}: {device_name}")
+            print(f"  - 默认分辨率: {width}x{height}")
+            print(f"  - 支持分辨率: {resolutions_str}")
+            print(f"  - 帧率: {capabilities['fps']}")
+            print(f"  - 后端: {capabilities['backend']}")
 
-                print(f"设备 {i}: {device_name}")
-                print(f"  - 默认分辨率: {width}x{height}")
-                print(f"  - 支持分辨率: {resolutions_str}")
-                print(f"  - 帧率: {capabilities['fps']}")
-                print(f"  - 后端: {capabilities['backend']}")
+            # 标记当前配置使用的摄像头
+            current_index = current_camera_config.get("camera_index")
+            if current_index == i:
+                print("当前配置使用的摄像头")
 
-                # 标记当前配置使用的摄像头
-                current_index = current_camera_config.get("camera_index")
-                if current_index == i:
-                    print("当前配置使用的摄像头")
+            # 添加到设备列表
+            camera_devices.append(
+                {"index": i, "name": device_name, "capabilities": capabilities}
+            )
 
-                # 添加到设备列表
-                camera_devices.append(
-                    {"index": i, "name": device_name, "capabilities": capabilities}
-                )
+            # 探测阶段已释放设备，测试与预览时重新打开选中的索引
+            cap = cv2.VideoCapture(i)
+            try:
+                if not cap.isOpened():
+                    print(f"  ✗ 重新打开设备 {i} 失败，跳过测试")
+                    continue
 
                 # 测试摄像头功能
                 print(f"正在测试设备 {i} 的摄像头功能...")
                 try:
-                    # 快速测试 - 读取几帧
+                    # 快速测试 - 抓取几帧
                     test_frames = 0
-                    start_time = time.time()
+                    deadline = time.monotonic() + 2
 
-                    while test_frames < 10 and time.time() - start_time < 2:
-                        ret, frame = cap.read()
-                        if ret:
+                    while test_frames < 10 and time.monotonic() < deadline:
+                        # 只抓取不解码，跳过颜色空间转换
+                        if cap.grab():
                             test_frames += 1
                         else:
                             break
@@ -184,9 +249,9 @@ def detect_cameras():
 
                 if show_preview == "y":
                     print(f"正在显示设备 {i} 的预览画面，按 'q' 键或等待3秒继续...")
-                    preview_start = time.time()
+                    preview_deadline = time.monotonic() + 3
 
-                    while time.time() - preview_start < 3:
+                    while time.monotonic() < preview_deadline:
                         ret, frame = cap.read()
                         if ret:
                             cv2.imshow(f"Camera {i} Preview", frame)
@@ -194,21 +259,9 @@ def detect_cameras():
                                 break
 
                     cv2.destroyAllWindows()
-
+            finally:
                 cap.release()
 
-            else:
-                # 如果连续两个索引无法打开摄像头，则认为没有更多摄像头了
-                consecutive_failures = 0
-                for j in range(i, i + 2):
-                    temp_cap = cv2.VideoCapture(j)
-                    if not temp_cap.isOpened():
-                        consecutive_failures += 1
-                    temp_cap.release()
-
-                if consecutive_failures >= 2 and i > 0:
-                    break
-
         except Exception as e:
             print(f"检测设备 {i} 时出错: {e}")
 
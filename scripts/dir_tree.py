@@ -1,4 +1,5 @@
 import os
+from collections import deque
 
 # 需要排除的目录 & 文件（你可以自定义）
 EXCLUDED_DIRS = {
@@ -16,29 +17,42 @@ EXCLUDED_DIRS = {
 EXCLUDED_FILES = {".DS_Store", "Thumbs.db"}
 
 
-def print_directory_tree(start_path=".", indent=""):
+def _ordered_entries(path):
     try:
-        files = sorted(os.listdir(start_path))
+        with os.scandir(path) as it:
+            # 过滤不需要的文件；DirEntry 自带类型信息，无需再逐个 stat
+            entries = sorted(
+                (e for e in it if e.name not in EXCLUDED_FILES), key=lambda e: e.name
+            )
     except PermissionError:
-        return
-
-    files = [f for f in files if f not in EXCLUDED_FILES]  # 过滤不需要的文件
-    dirs = [
-        d
-        for d in files
-        if os.path.isdir(os.path.join(start_path, d)) and d not in EXCLUDED_DIRS
-    ]
-    files = [f for f in files if os.path.isfile(os.path.join(start_path, f))]
-
-    for index, file in enumerate(dirs + files):
-        path = os.path.join(start_path, file)
-        is_last = index == len(dirs + files) - 1
+        return []
+
+    dirs = [e for e in entries if e.is_dir() and e.name not in EXCLUDED_DIRS]
+    files = [e for e in entries if e.is_file()]
+    return dirs + files
+
+
+def print_directory_tree(start_path=".", indent=""):
+    # 用显式栈代替递归，栈中保存待输出的 (条目, 缩进, 是否为同级最后一项)
+    stack = deque()
+
+    def push_children(path, child_indent):
+        ordered = _ordered_entries(path)
+        last_index = len(ordered) - 1
+        # 逆序入栈，使出栈顺序与目录内的排序一致
+        stack.extend(
+            (ordered[index], child_indent, index == last_index)
+            for index in range(last_index, -1, -1)
+        )
+
+    push_children(start_path, indent)
+    while stack:
+        entry, entry_indent, is_last = stack.pop()
         prefix = "└── " if is_last else "├── "
-        print(indent + prefix + file)
+        print(entry_indent + prefix + entry.name)
 
-        if os.path.isdir(path):
-            next_indent = indent + ("    " if is_last else "│   ")
-            print_directory_tree(path, next_indent)
+        if entry.is_dir():
+            push_children(entry.path, entry_indent + ("    " if is_last else "│   "))
 
 
 if __name__ == "__main__":
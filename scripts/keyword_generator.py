@@ -8,18 +8,62 @@
 2. 按字母分隔拼音（声母+韵母）
 3. 验证token是否在tokens.txt中
 4. 自动生成keywords.txt格式
+
+环境变量：
+- PYPINYIN_NO_DICT_COPY 默认开启，pypinyin 直接使用内置词典而不再复制一份，
+  降低内存占用
+- PYPINYIN_NO_PHRASES 可手动设为 true 跳过加载词组词典，启动更快、内存更低，
+  但多音字将无法按词组消歧（如"银行"会被转换为 yín xíng），默认不开启
 """
 
+import atexit
+import json
+import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 
+# 必须在导入 pypinyin 之前设置
+os.environ.setdefault('PYPINYIN_NO_DICT_COPY', 'true')
+
 try:
+    from pypinyin import __version__ as PYPINYIN_VERSION
     from pypinyin import lazy_pinyin, Style
 except ImportError:
     print("❌ 缺少依赖: pypinyin")
     print("请安装: pip install pypinyin")
     sys.exit(1)
 
+# 拼音转换结果的持久化缓存，避免重复导入同一批关键词时反复查询pypinyin
+PINYIN_CACHE_FILE = Path.home() / ".cache" / "xiaozhi" / "pinyin.json"
+
+# 缓存头：pypinyin 版本或词组词典开关变化都会改变转换结果，不一致时整体丢弃缓存
+PINYIN_CACHE_META = {
+    'pypinyin': PYPINYIN_VERSION,
+    'no_phrases': os.environ.get('PYPINYIN_NO_PHRASES', ''),
+}
+
+
+@lru_cache(maxsize=4096)
+def _split_pinyin_cached(pinyin: str, init2: frozenset, init1: frozenset) -> tuple:
+    """按声母韵母分隔拼音，两次集合查找代替逐个声母匹配，结果带缓存"""
+    if not pinyin:
+        return ()
+
+    # 双字母声母（zh, ch, sh）优先
+    if pinyin[:2] in init2:
+        initial = pinyin[:2]
+    elif pinyin[:1] in init1:
+        initial = pinyin[:1]
+    else:
+        # 没有声母（零声母）
+        return (pinyin,)
+
+    final = pinyin[len(initial):]
+    if final:
+        return (initial, final)
+    return (initial,)
+
 
 class KeywordGenerator:
     def __init__(self, model_dir: Path):
@@ -36,12 +80,23 @@ class KeywordGenerator:
         # 加载已有的tokens
         self.available_tokens = self._load_tokens()
 
+        # 已有关键词（@后的中文）集合，首次查重时再解析keywords.txt
+        self._existing_chinese = None
+
+        # 加载拼音缓存，退出时如有新增则写回
+        self._pinyin_cache = self._load_pinyin_cache()
+        self._pinyin_cache_dirty = False
+        atexit.register(self._save_pinyin_cache)
+
         # 声母表（需要分离的）
         self.initials = [
             'b', 'p', 'm', 'f', 'd', 't', 'n', 'l',
             'g', 'k', 'h', 'j', 'q', 'x',
             'zh', 'ch', 'sh', 'r', 'z', 'c', 's', 'y', 'w'
         ]
+        # 按长度拆成双字母/单字母两张查找表
+        self._init2 = frozenset(i for i in self.initials if len(i) == 2)
+        self._init1 = frozenset(i for i in self.initials if len(i) == 1)
 
     def _load_tokens(self) -> set:
         """加载tokens.txt中的所有可用token"""
@@ -62,6 +117,52 @@ class KeywordGenerator:
         print(f"✅ 加载了 {len(tokens)} 个可用tokens")
         return tokens
 
+    def _load_pinyin_cache(self) -> dict:
+        """加载拼音缓存，格式: {风格名: {中文: 拼音列表}}
+
+        缓存文件为 {"meta": 缓存头, "entries": 缓存内容}，缓存头与当前环境不一致时丢弃
+        """
+        try:
+            with open(PINYIN_CACHE_FILE, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if (
+                isinstance(cache, dict)
+                and cache.get('meta') == PINYIN_CACHE_META
+                and isinstance(cache.get('entries'), dict)
+            ):
+                return cache['entries']
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️  拼音缓存读取失败，将重新生成: {e}")
+        return {}
+
+    def _save_pinyin_cache(self):
+        """将新增的拼音转换结果连同缓存头写回缓存文件"""
+        if not self._pinyin_cache_dirty:
+            return
+        try:
+            PINYIN_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(PINYIN_CACHE_FILE, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {'meta': PINYIN_CACHE_META, 'entries': self._pinyin_cache},
+                    f,
+                    ensure_ascii=False,
+                )
+            self._pinyin_cache_dirty = False
+        except Exception as e:
+            print(f"⚠️  拼音缓存保存失败: {e}")
+
+    def _to_pinyin(self, chinese_text: str, style=Style.TONE) -> list:
+        """将中文转换为拼音列表，优先使用缓存"""
+        style_cache = self._pinyin_cache.setdefault(style.name, {})
+        pinyin_list = style_cache.get(chinese_text)
+        if pinyin_list is None:
+            pinyin_list = lazy_pinyin(chinese_text, style=style)
+            style_cache[chinese_text] = pinyin_list
+            self._pinyin_cache_dirty = True
+        return pinyin_list
+
     def _split_pinyin(self, pinyin: str) -> list:
         """
         将拼音按声母韵母分隔
@@ -70,20 +171,7 @@ class KeywordGenerator:
               "mǐ" -> ["m", "ǐ"]
               "ài" -> ["ài"]  (零声母)
         """
-        if not pinyin:
-            return []
-
-        # 按长度优先尝试匹配声母（zh, ch, sh优先）
-        for initial in sorted(self.initials, key=len, reverse=True):
-            if pinyin.startswith(initial):
-                final = pinyin[len(initial):]
-                if final:
-                    return [initial, final]
-                else:
-                    return [initial]
-
-        # 没有声母（零声母）
-        return [pinyin]
+        return list(_split_pinyin_cached(pinyin, self._init2, self._init1))
 
     def chinese_to_keyword_format(self, chinese_text: str) -> str:
         """
@@ -96,7 +184,7 @@ class KeywordGenerator:
             keyword格式，如"x iǎo m ǐ x iǎo m ǐ @小米小米"
         """
         # 转换为带声调拼音
-        pinyin_list = lazy_pinyin(chinese_text, style=Style.TONE)
+        pinyin_list = self._to_pinyin(chinese_text)
 
         # 分割每个拼音
         split_parts = []
@@ -137,19 +225,22 @@ class KeywordGenerator:
             # 生成keyword格式
             keyword_line = self.chinese_to_keyword_format(chinese_text)
 
-            # 检查是否已存在
-            if self.keywords_file.exists():
-                with open(self.keywords_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    if f"@{chinese_text}" in content:
-                        print(f"⚠️  关键词 '{chinese_text}' 已存在")
-                        return False
+            # 检查是否已存在（按@后的中文精确匹配）
+            existing = self._get_existing_chinese()
+            if chinese_text in existing:
+                print(f"⚠️  关键词 '{chinese_text}' 已存在")
+                return False
 
             # 写入文件
             mode = 'a' if append else 'w'
             with open(self.keywords_file, mode, encoding='utf-8') as f:
                 f.write(keyword_line + '\n')
 
+            if append:
+                existing.add(chinese_text)
+            else:
+                self._existing_chinese = {chinese_text}
+
             print(f"✅ 成功添加: {keyword_line}")
             return True
 
@@ -157,30 +248,73 @@ class KeywordGenerator:
             print(f"❌ 添加失败: {e}")
             return False
 
+    def _load_existing_chinese(self) -> set:
+        """一次性解析keywords.txt，返回已有关键词的中文部分集合"""
+        existing = set()
+        if not self.keywords_file.exists():
+            return existing
+
+        with open(self.keywords_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if '@' in line:
+                    existing.add(line.split('@', 1)[1].strip())
+        return existing
+
+    def _get_existing_chinese(self) -> set:
+        """获取已有关键词集合，首次使用时解析keywords.txt"""
+        if self._existing_chinese is None:
+            self._existing_chinese = self._load_existing_chinese()
+        return self._existing_chinese
+
     def batch_add_keywords(self, chinese_texts: list, overwrite: bool = False):
         """
         批量添加唤醒词
 
+        只读取一次keywords.txt做去重，所有新行在最后一次性写入
+
         Args:
             chinese_texts: 中文列表
             overwrite: 是否覆盖原文件
         """
         if overwrite:
             print("⚠️  将覆盖现有keywords.txt")
+            existing = set()
+        else:
+            # 复制一份，写入成功后再替换缓存
+            existing = set(self._get_existing_chinese())
 
-        success_count = 0
+        new_lines = []
         for text in chinese_texts:
             text = text.strip()
             if not text:
                 continue
 
-            if self.add_keyword(text, append=not overwrite):
-                success_count += 1
+            if text in existing:
+                print(f"⚠️  关键词 '{text}' 已存在")
+                continue
+
+            try:
+                keyword_line = self.chinese_to_keyword_format(text)
+            except Exception as e:
+                print(f"❌ 添加失败: {e}")
+                continue
+
+            new_lines.append(keyword_line)
+            existing.add(text)
 
-            # 第一个后都追加
-            overwrite = False
+        try:
+            mode = 'w' if overwrite else 'a'
+            with open(self.keywords_file, mode, encoding='utf-8') as f:
+                f.writelines(line + '\n' for line in new_lines)
+            self._existing_chinese = existing
+        except Exception as e:
+            print(f"❌ 写入失败: {e}")
+            new_lines = []
+
+        for keyword_line in new_lines:
+            print(f"✅ 成功添加: {keyword_line}")
 
-        print(f"\n📊 完成: 成功添加 {success_count}/{len(chinese_texts)} 个关键词")
+        print(f"\n📊 完成: 成功添加 {len(new_lines)}/{len(chinese_texts)} 个关键词")
 
     def list_keywords(self):
         """列出当前所有关键词"""
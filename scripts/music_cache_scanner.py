@@ -3,12 +3,18 @@
 """音乐缓存扫描器 扫描cache/music目录中的音乐文件，提取元数据，生成本地歌单.
 
 依赖安装: pip install mutagen
+可选依赖: pip install tqdm（显示扫描进度条）
 """
 
 import hashlib
 import json
+import os
+import re
 import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from operator import attrgetter
 from pathlib import Path
 from typing import Dict, List, Optional
 
@@ -20,22 +26,77 @@ except ImportError:
     print("请运行: pip install mutagen")
     sys.exit(1)
 
+try:
+    from tqdm import tqdm
+except ImportError:  # tqdm 为可选依赖，未安装时按批次打印进度
+    tqdm = None
+
 # 项目根目录
 PROJECT_ROOT = Path(__file__).parent.parent
 
+# 支持的音乐文件扩展名及其排列顺序
+MUSIC_EXTENSIONS = {".mp3": 0, ".m4a": 1, ".flac": 2, ".wav": 3, ".ogg": 4}
+
+# 从日期字符串中提取年份
+_YEAR_RE = re.compile(r"(\d{4})")
+
+# 扫描线程数：读取文件和解析标签以I/O等待为主，线程数可高于CPU核数
+SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# 歌单排序键，单属性排序直接用 attrgetter
+_SORT_KEYS = {
+    "artist": lambda x: (
+        x.artist or "Unknown",
+        x.album or "Unknown",
+        x.title or "Unknown",
+    ),
+    "title": lambda x: x.title or "Unknown",
+    "album": lambda x: (x.album or "Unknown", x.artist or "Unknown"),
+    "duration": lambda x: x.duration or 0,
+    "file_size": attrgetter("file_size"),
+    "creation_time": attrgetter("creation_time"),
+}
+
+# 未安装 tqdm 时，每扫描多少个文件打印一次进度
+SCAN_PROGRESS_INTERVAL = 100
+
 
 class MusicMetadata:
     """
     音乐元数据类.
     """
 
-    def __init__(self, file_path: Path):
+    # 扫描时每个文件一个实例，使用 __slots__ 省去每个实例的 __dict__
+    __slots__ = (
+        "file_path",
+        "filename",
+        "file_id",
+        "file_size",
+        "creation_time",
+        "modification_time",
+        "title",
+        "artist",
+        "album",
+        "genre",
+        "year",
+        "duration",
+        "bitrate",
+        "sample_rate",
+        "_file_hash",
+        "_search_blob",
+    )
+
+    def __init__(self, file_path: Path, stat_result: os.stat_result = None):
         self.file_path = file_path
         self.filename = file_path.name
         self.file_id = file_path.stem  # 文件名去掉扩展名，即歌曲ID
-        self.file_size = file_path.stat().st_size
-        self.creation_time = datetime.fromtimestamp(file_path.stat().st_ctime)
-        self.modification_time = datetime.fromtimestamp(file_path.stat().st_mtime)
+
+        # 只取一次文件状态；扫描目录时可直接传入 DirEntry.stat() 的结果
+        if stat_result is None:
+            stat_result = file_path.stat()
+        self.file_size = stat_result.st_size
+        self.creation_time = datetime.fromtimestamp(stat_result.st_ctime)
+        self.modification_time = datetime.fromtimestamp(stat_result.st_mtime)
 
         # 从文件提取的元数据
         self.title = None
@@ -47,20 +108,37 @@ class MusicMetadata:
         self.bitrate = None
         self.sample_rate = None
 
-        # 文件哈希（用于去重）
-        self.file_hash = self._calculate_hash()
+        # 文件哈希（用于去重），首次访问 file_hash 时计算
+        self._file_hash = None
+
+        # 搜索用的小写文本，首次搜索时生成
+        self._search_blob = None
+
+    @property
+    def file_hash(self) -> str:
+        """
+        文件哈希，首次访问时才读取文件计算.
+        """
+        if self._file_hash is None:
+            self._file_hash = self._calculate_hash()
+        return self._file_hash
 
     def _calculate_hash(self) -> str:
         """
-        计算文件MD5哈希值（仅前1MB避免大文件计算过慢）
+        计算文件哈希值（仅前1MB避免大文件计算过慢）
         """
         try:
-            hash_md5 = hashlib.md5()
-            with open(self.file_path, "rb") as f:
-                # 只读取前1MB计算哈希
-                chunk = f.read(1024 * 1024)
-                hash_md5.update(chunk)
-            return hash_md5.hexdigest()[:16]  # 取前16位
+            # 无缓冲读取前1MB；原始读取可能返回不足，循环直到读满或到达文件末尾
+            buf = bytearray(1024 * 1024)
+            view = memoryview(buf)
+            total = 0
+            with open(self.file_path, "rb", buffering=0) as f:
+                while total < len(buf):
+                    n = f.readinto(view[total:])
+                    if not n:
+                        break
+                    total += n
+            return hashlib.blake2b(view[:total], digest_size=8).hexdigest()
         except Exception:
             return "unknown"
 
@@ -103,9 +181,7 @@ class MusicMetadata:
                     self.year = int(year_str)
                 else:
                     # 尝试从日期字符串中提取年份
-                    import re
-
-                    year_match = re.search(r"(\d{4})", year_str)
+                    year_match = _YEAR_RE.search(year_str)
                     if year_match:
                         self.year = int(year_match.group(1))
 
@@ -131,6 +207,16 @@ class MusicMetadata:
                     return str(value)
         return None
 
+    def get_search_text(self) -> str:
+        """
+        获取用于搜索的小写文本（标题、艺术家、专辑、文件名）
+        """
+        if self._search_blob is None:
+            self._search_blob = " ".join(
+                filter(None, [self.title, self.artist, self.album, self.filename])
+            ).lower()
+        return self._search_blob
+
     def format_duration(self) -> str:
         """
         格式化播放时长.
@@ -156,6 +242,8 @@ class MusicMetadata:
     def to_dict(self) -> Dict:
         """
         转换为字典格式.
+
+        file_hash 只输出已计算的值（去重时算过的文件），导出时不为此逐个读取文件.
         """
         return {
             "file_id": self.file_id,
@@ -171,7 +259,7 @@ class MusicMetadata:
             "sample_rate": self.sample_rate,
             "file_size": self.file_size,
             "file_size_formatted": self.format_file_size(),
-            "file_hash": self.file_hash,
+            "file_hash": self._file_hash,
             "creation_time": self.creation_time.isoformat(),
             "modification_time": self.modification_time.isoformat(),
         }
@@ -203,10 +291,16 @@ class MusicCacheScanner:
             print(f"❌ 缓存目录不存在: {self.cache_dir}")
             return False
 
-        # 查找所有音乐文件
+        # 单次遍历目录查找所有音乐文件，按扩展名分组排列
+        # 保留 DirEntry 以便复用其缓存的文件状态
         music_files = []
-        for pattern in ["*.mp3", "*.m4a", "*.flac", "*.wav", "*.ogg"]:
-            music_files.extend(self.cache_dir.glob(pattern))
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                suffix = os.path.splitext(entry.name)[1].lower()
+                if suffix in MUSIC_EXTENSIONS and entry.is_file():
+                    music_files.append((MUSIC_EXTENSIONS[suffix], entry))
+        music_files.sort(key=lambda item: item[0])
+        music_files = [entry for _, entry in music_files]
 
         if not music_files:
             print("📁 缓存目录中没有找到音乐文件")
@@ -215,51 +309,82 @@ class MusicCacheScanner:
         self.scan_stats["total_files"] = len(music_files)
         print(f"📊 找到 {len(music_files)} 个音乐文件")
 
-        # 扫描每个文件
-        for i, file_path in enumerate(music_files, 1):
-            print(f"🔍 [{i}/{len(music_files)}] 扫描: {file_path.name}")
-
-            try:
-                metadata = MusicMetadata(file_path)
-
-                if metadata.extract_metadata():
-                    self.playlist.append(metadata)
-                    self.scan_stats["success_count"] += 1
-
-                    # 累计统计
-                    if metadata.duration:
-                        self.scan_stats["total_duration"] += metadata.duration
-                    self.scan_stats["total_size"] += metadata.file_size
-
-                    # 显示基本信息
-                    display_title = metadata.title or "未知标题"
-                    display_artist = metadata.artist or "未知艺术家"
-                    print(
-                        f"   ✅ {display_title} - {display_artist} ({metadata.format_duration()})"
-                    )
-                else:
-                    self.scan_stats["error_count"] += 1
-                    print("   ❌ 元数据提取失败")
+        # 进度只做汇总显示，逐个文件只输出失败信息
+        total = len(music_files)
+        progress = None
+        if tqdm is not None:
+            progress = tqdm(total=total, desc="🔍 扫描", unit="首")
+            report = progress.write
+        else:
+            report = print
 
-            except Exception as e:
-                self.scan_stats["error_count"] += 1
-                print(f"   ❌ 处理失败: {e}")
+        # 多线程并发读取和解析文件，结果按原文件顺序在主线程汇总
+        try:
+            with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+                results = executor.map(self._scan_file, music_files)
+
+                for i, (entry, (metadata, ok, error)) in enumerate(
+                    zip(music_files, results), 1
+                ):
+                    if error is not None:
+                        self.scan_stats["error_count"] += 1
+                        report(f"   ❌ {entry.name} 处理失败: {error}")
+                    elif ok:
+                        self.playlist.append(metadata)
+                        self.scan_stats["success_count"] += 1
+
+                        # 累计统计
+                        if metadata.duration:
+                            self.scan_stats["total_duration"] += metadata.duration
+                        self.scan_stats["total_size"] += metadata.file_size
+                    else:
+                        self.scan_stats["error_count"] += 1
+                        report(f"   ❌ {entry.name} 元数据提取失败")
+
+                    if progress is not None:
+                        progress.update(1)
+                    elif i % SCAN_PROGRESS_INTERVAL == 0 or i == total:
+                        print(f"🔍 已扫描 [{i}/{total}]")
+        finally:
+            if progress is not None:
+                progress.close()
 
         return True
 
+    @staticmethod
+    def _scan_file(entry: os.DirEntry):
+        """
+        在工作线程中处理单个文件，返回 (元数据, 是否成功, 异常)
+        """
+        try:
+            metadata = MusicMetadata(Path(entry.path), entry.stat())
+            return metadata, metadata.extract_metadata(), None
+        except Exception as e:
+            return None, False, e
+
     def remove_duplicates(self):
         """
         移除重复的音乐文件（基于哈希值）
+
+        先按文件大小分组，只有大小相同的文件才需要读取内容计算哈希
         """
-        seen_hashes = set()
+        size_counts = Counter(metadata.file_size for metadata in self.playlist)
+
+        seen_keys = set()
         unique_playlist = []
         duplicates = []
 
         for metadata in self.playlist:
-            if metadata.file_hash in seen_hashes:
+            if size_counts[metadata.file_size] == 1:
+                # 大小唯一，不可能与其他文件重复
+                unique_playlist.append(metadata)
+                continue
+
+            key = (metadata.file_size, metadata.file_hash)
+            if key in seen_keys:
                 duplicates.append(metadata)
             else:
-                seen_hashes.add(metadata.file_hash)
+                seen_keys.add(key)
                 unique_playlist.append(metadata)
 
         if duplicates:
@@ -273,21 +398,10 @@ class MusicCacheScanner:
         """
         排序歌单.
         """
-        sort_functions = {
-            "artist": lambda x: (
-                x.artist or "Unknown",
-                x.album or "Unknown",
-                x.title or "Unknown",
-            ),
-            "title": lambda x: x.title or "Unknown",
-            "album": lambda x: (x.album or "Unknown", x.artist or "Unknown"),
-            "duration": lambda x: x.duration or 0,
-            "file_size": lambda x: x.file_size,
-            "creation_time": lambda x: x.creation_time,
-        }
-
-        if sort_by in sort_functions:
-            self.playlist.sort(key=sort_functions[sort_by])
+        # list.sort 的 key 对每个元素只求值一次（内部即装饰-排序-去装饰）
+        key = _SORT_KEYS.get(sort_by)
+        if key is not None:
+            self.playlist.sort(key=key)
             print(f"📋 歌单已按 {sort_by} 排序")
 
     def print_statistics(self):
@@ -351,18 +465,15 @@ class MusicCacheScanner:
 
         try:
             if format == "json":
-                playlist_data = {
-                    "metadata": {
-                        "generated_at": datetime.now().isoformat(),
-                        "cache_directory": str(self.cache_dir),
-                        "total_songs": len(self.playlist),
-                        "statistics": self.scan_stats,
-                    },
-                    "playlist": [metadata.to_dict() for metadata in self.playlist],
+                export_metadata = {
+                    "generated_at": datetime.now().isoformat(),
+                    "cache_directory": str(self.cache_dir),
+                    "total_songs": len(self.playlist),
+                    "statistics": self.scan_stats,
                 }
 
                 with open(output_file, "w", encoding="utf-8") as f:
-                    json.dump(playlist_data, f, ensure_ascii=False, indent=2)
+                    self._write_json_playlist(f, export_metadata)
 
             elif format == "m3u":
                 with open(output_file, "w", encoding="utf-8") as f:
@@ -382,31 +493,34 @@ class MusicCacheScanner:
             print(f"❌ 导出失败: {e}")
             return None
 
-    def search_songs(self, query: str) -> List[MusicMetadata]:
+    def _write_json_playlist(self, f, export_metadata: Dict):
         """
-        搜索歌曲.
+        逐条流式写出JSON歌单，格式与 json.dump(indent=2) 一致，不在内存中构建完整列表.
         """
-        query = query.lower()
-        results = []
 
-        for metadata in self.playlist:
-            # 在标题、艺术家、专辑中搜索
-            searchable_text = " ".join(
-                filter(
-                    None,
-                    [
-                        metadata.title,
-                        metadata.artist,
-                        metadata.album,
-                        metadata.filename,
-                    ],
-                )
-            ).lower()
+        def dumps(obj, indent: str) -> str:
+            text = json.dumps(obj, ensure_ascii=False, indent=2)
+            return text.replace("\n", "\n" + indent)
 
-            if query in searchable_text:
-                results.append(metadata)
+        f.write('{\n  "metadata": ')
+        f.write(dumps(export_metadata, "  "))
+        f.write(',\n  "playlist": [')
+        for i, metadata in enumerate(self.playlist):
+            f.write(",\n    " if i else "\n    ")
+            f.write(dumps(metadata.to_dict(), "    "))
+        f.write("\n  ]\n}" if self.playlist else "]\n}")
 
-        return results
+    def search_songs(self, query: str) -> List[MusicMetadata]:
+        """
+        搜索歌曲.
+        """
+        query = query.lower()
+        # 在标题、艺术家、专辑、文件名中搜索
+        return [
+            metadata
+            for metadata in self.playlist
+            if query in metadata.get_search_text()
+        ]
 
     def get_artists(self) -> Dict[str, List[MusicMetadata]]:
         """
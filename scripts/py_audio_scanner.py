@@ -1,25 +1,52 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+from functools import lru_cache
+
 import numpy as np
 import sounddevice as sd
 
 
+@lru_cache(maxsize=1)
+def _cached_devices():
+    """
+    枚举音频设备及默认设备，结果缓存以避免重复初始化PortAudio主机API.
+    """
+    return sd.query_devices(), sd.default.device
+
+
+@lru_cache(maxsize=8)
+def _test_tone(sample_rate, duration, frequency=440):
+    """
+    生成int16测试正弦波（满幅的30%），相同参数只计算一次.
+    """
+    n_samples = int(sample_rate * duration)
+    # 在同一个float32缓冲区内原地完成相位计算、正弦和缩放
+    tone = np.arange(n_samples, dtype=np.float32)
+    tone *= np.float32(2 * np.pi * frequency / sample_rate)
+    np.sin(tone, out=tone)
+    tone *= np.float32(0.3 * 32767)
+    return tone.astype(np.int16)
+
+
 def detect_audio_devices():
     """
     检测并列出所有音频设备 (使用sounddevice)
     """
     print("\n===== 音频设备检测 (SoundDevice) =====\n")
 
+    devices, default_device = _cached_devices()
+
     # 获取默认设备
-    default_input = sd.default.device[0] if sd.default.device else None
-    default_output = sd.default.device[1] if sd.default.device else None
+    default_input = default_device[0] if default_device else None
+    default_output = default_device[1] if default_device else None
 
-    # 存储找到的设备
+    # 存储找到的设备，同时记录候选推荐设备
     input_devices = []
     output_devices = []
+    usb_mic = None
+    headphones = None
 
     # 列出所有设备
-    devices = sd.query_devices()
     for i, dev_info in enumerate(devices):
         # 打印设备信息
         print(f"设备 {i}: {dev_info['name']}")
@@ -38,12 +65,16 @@ def detect_audio_devices():
             input_devices.append((i, dev_info["name"]))
             if "USB" in dev_info["name"]:
                 print("  - 可能是USB麦克风 🎤")
+                if usb_mic is None:
+                    usb_mic = (i, dev_info["name"])
 
         # 识别输出设备（扬声器）
         if dev_info["max_output_channels"] > 0:
             output_devices.append((i, dev_info["name"]))
             if "Headphones" in dev_info["name"]:
                 print("  - 可能是耳机输出 🎧")
+                if headphones is None:
+                    headphones = (i, dev_info["name"])
             elif "USB" in dev_info["name"] and dev_info["max_output_channels"] > 0:
                 print("  - 可能是USB扬声器 🔊")
 
@@ -71,12 +102,7 @@ def detect_audio_devices():
         recommended_mic = (default_input, devices[default_input]["name"])
     elif input_devices:
         # 优先USB设备
-        for idx, name in input_devices:
-            if "USB" in name:
-                recommended_mic = (idx, name)
-                break
-        if recommended_mic is None:
-            recommended_mic = input_devices[0]
+        recommended_mic = usb_mic or input_devices[0]
 
     # 推荐扬声器
     recommended_speaker = None
@@ -84,12 +110,7 @@ def detect_audio_devices():
         recommended_speaker = (default_output, devices[default_output]["name"])
     elif output_devices:
         # 优先耳机
-        for idx, name in output_devices:
-            if "Headphones" in name:
-                recommended_speaker = (idx, name)
-                break
-        if recommended_speaker is None:
-            recommended_speaker = output_devices[0]
+        recommended_speaker = headphones or output_devices[0]
 
     if recommended_mic:
         print(f"  - 麦克风: 设备 {recommended_mic[0]} ({recommended_mic[1]})")
@@ -152,8 +173,7 @@ def detect_audio_devices():
             # 生成测试音频 (440Hz正弦波)
             duration = 0.5
             sample_rate = 44100
-            t = np.linspace(0, duration, int(sample_rate * duration))
-            test_audio = (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+            test_audio = _test_tone(sample_rate, duration)
 
             sd.play(test_audio, samplerate=sample_rate, device=recommended_speaker[0])
             sd.wait()
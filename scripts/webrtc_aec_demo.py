@@ -15,17 +15,17 @@
 
 import ctypes
 import os
+import queue
 import sys
-import threading
 import time
 import wave
+from collections import deque
 from ctypes import POINTER, Structure, byref, c_bool, c_float, c_int, c_short, c_void_p
 
 import numpy as np
 import pyaudio
-import pygame
+import sounddevice as sd
 import soundfile as sf
-from pygame import mixer
 
 # 获取DLL文件的绝对路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -42,6 +42,13 @@ except Exception as e:
     print(f"加载WebRTC APM库失败: {e}")
     sys.exit(1)
 
+# 可选的 Cython 加速层（libs/webrtc_apm/_apm_cy.pyx），未编译时回退到 ctypes 逐帧调用
+sys.path.insert(0, project_root)
+try:
+    from libs.webrtc_apm import _apm_cy
+except ImportError:
+    _apm_cy = None
+
 
 # 定义结构体和枚举类型
 class DownmixMethod(ctypes.c_int):
@@ -251,8 +258,14 @@ apm_lib.WebRTC_APM_ProcessStream.argtypes = [
 apm_lib.WebRTC_APM_SetStreamDelayMs.restype = None
 apm_lib.WebRTC_APM_SetStreamDelayMs.argtypes = [c_void_p, c_int]
 
+# 逐帧处理函数的地址，供 Cython 加速层直接调用
+_PROCESS_REVERSE_ADDR = ctypes.cast(
+    apm_lib.WebRTC_APM_ProcessReverseStream, c_void_p
+).value
+_PROCESS_STREAM_ADDR = ctypes.cast(apm_lib.WebRTC_APM_ProcessStream, c_void_p).value
 
-def create_apm_config():
+
+def _build_apm_config():
     """创建WebRTC APM配置 - 优化为保留自然语音，减少错误码-11问题"""
     config = Config()
 
@@ -332,17 +345,30 @@ def create_apm_config():
     return config
 
 
-# 参考音频缓冲区（用于存储扬声器输出）
-reference_buffer = []
-reference_lock = threading.Lock()
+# APM配置各字段均为固定值，导入时构建一次作为模板
+_APM_TEMPLATE = _build_apm_config()
+
+
+def create_apm_config():
+    """
+    复制APM配置模板，返回可独立修改的Config.
+    """
+    config = Config()
+    ctypes.memmove(
+        ctypes.addressof(config), ctypes.addressof(_APM_TEMPLATE), ctypes.sizeof(Config)
+    )
+    return config
+
+
+# 参考音频缓冲区（用于存储扬声器输出），最多保留100帧（约2秒），超出时自动丢弃最旧的帧
+# deque 的 append 本身是线程安全的，读取方可通过 list(reference_buffer) 获取快照
+reference_buffer = deque(maxlen=100)
 
 
 def record_playback_audio(chunk_size, sample_rate, channels):
     """
     录制扬声器输出的音频（更准确的参考信号）
     """
-    global reference_buffer
-
     # 注：这是理想情况下的实现，但Windows下PyAudio通常无法直接录制扬声器输出
     # 实际应用中，需要使用其他方法捕获系统音频输出
     try:
@@ -363,15 +389,9 @@ def record_playback_audio(chunk_size, sample_rate, channels):
         while True:
             try:
                 data = loopback_stream.read(chunk_size, exception_on_overflow=False)
-                with reference_lock:
-                    reference_buffer.append(data)
+                reference_buffer.append(data)
             except OSError:
                 break
-
-            # 保持缓冲区大小合理
-            with reference_lock:
-                if len(reference_buffer) > 100:  # 保持约2秒的缓冲
-                    reference_buffer = reference_buffer[-100:]
     except Exception as e:
         print(f"无法录制系统音频: {e}")
     finally:
@@ -385,6 +405,63 @@ def record_playback_audio(chunk_size, sample_rate, channels):
             pass
 
 
+def process_aec_batch(
+    apm, stream_config, ref_block, ref_output_block, input_block, output_block, n_frames
+):
+    """
+    批量处理连续的n_frames个10ms帧，每帧先处理参考信号再处理麦克风信号.
+
+    Returns:
+        第一个非零错误码，全部成功时为0
+    """
+    if _apm_cy is not None:
+        # 整批在C层循环处理，只跨越一次Python/C边界
+        return _apm_cy.process_duplex_batch(
+            _PROCESS_REVERSE_ADDR,
+            _PROCESS_STREAM_ADDR,
+            apm,
+            ref_block,
+            ref_output_block,
+            input_block,
+            output_block,
+            stream_config,
+            stream_config,
+            n_frames,
+        )
+
+    # ctypes回退：按帧偏移指针逐帧调用
+    frame_bytes = len(input_block) // n_frames * 2
+    ref_addr = ref_block.ctypes.data
+    ref_output_addr = ref_output_block.ctypes.data
+    input_addr = input_block.ctypes.data
+    output_addr = output_block.ctypes.data
+    short_ptr = POINTER(c_short)
+    status = 0
+    for i in range(n_frames):
+        offset = i * frame_bytes
+        # 重要：先处理参考信号（扬声器输出）
+        result = apm_lib.WebRTC_APM_ProcessReverseStream(
+            apm,
+            ctypes.cast(ref_addr + offset, short_ptr),
+            stream_config,
+            stream_config,
+            ctypes.cast(ref_output_addr + offset, short_ptr),
+        )
+        if result != 0 and status == 0:
+            status = result
+        # 然后处理麦克风信号，应用回声消除
+        result = apm_lib.WebRTC_APM_ProcessStream(
+            apm,
+            ctypes.cast(input_addr + offset, short_ptr),
+            stream_config,
+            stream_config,
+            ctypes.cast(output_addr + offset, short_ptr),
+        )
+        if result != 0 and status == 0:
+            status = result
+    return status
+
+
 def aec_demo(audio_file):
     """
     WebRTC回声消除演示主函数.
@@ -398,34 +475,36 @@ def aec_demo(audio_file):
     SAMPLE_RATE = 16000  # 采样率16kHz (WebRTC AEC优化采样率)
     CHANNELS = 1  # 单声道
     CHUNK = 160  # 每帧样本数(10ms @ 16kHz，WebRTC的标准帧大小)
-    FORMAT = pyaudio.paInt16  # 16位PCM格式
-
-    # 初始化PyAudio
-    p = pyaudio.PyAudio()
+    BATCH_FRAMES = 10  # 攒够10帧(100ms)后一次性交给APM处理
 
     # 列出所有可用的音频设备信息供参考
     print("\n可用音频设备:")
-    for i in range(p.get_device_count()):
-        dev_info = p.get_device_info_by_index(i)
+    for i, dev_info in enumerate(sd.query_devices()):
         print(f"设备 {i}: {dev_info['name']}")
-        print(f"  - 输入通道: {dev_info['maxInputChannels']}")
-        print(f"  - 输出通道: {dev_info['maxOutputChannels']}")
-        print(f"  - 默认采样率: {dev_info['defaultSampleRate']}")
+        print(f"  - 输入通道: {dev_info['max_input_channels']}")
+        print(f"  - 输出通道: {dev_info['max_output_channels']}")
+        print(f"  - 默认采样率: {dev_info['default_samplerate']}")
     print("")
 
-    # 打开麦克风输入流
-    input_stream = p.open(
-        format=FORMAT,
+    # 麦克风采集队列：音频回调只负责把每帧数据放入队列，处理在主循环中进行
+    capture_queue = queue.Queue(maxsize=8)
+
+    def input_callback(indata, frames, time_info, status):
+        try:
+            capture_queue.put_nowait(bytes(indata))
+        except queue.Full:
+            pass  # 主循环处理不及时，丢弃该帧
+
+    # 打开麦克风输入流（回调模式，每次回调恰好一帧）
+    input_stream = sd.RawInputStream(
+        samplerate=SAMPLE_RATE,
         channels=CHANNELS,
-        rate=SAMPLE_RATE,
-        input=True,
-        frames_per_buffer=CHUNK,
+        dtype="int16",
+        blocksize=CHUNK,
+        latency="low",
+        callback=input_callback,
     )
 
-    # 初始化pygame用于播放音频
-    pygame.init()
-    mixer.init(frequency=SAMPLE_RATE, size=-16, channels=CHANNELS, buffer=CHUNK * 4)
-
     # 加载参考音频文件
     print(f"加载音频文件: {audio_file}")
 
@@ -433,54 +512,70 @@ def aec_demo(audio_file):
     # 注意：这里使用soundfile库加载音频文件以支持多种格式并进行重采样
     try:
         print("加载参考音频...")
-        # 使用soundfile库读取原始音频
-        ref_audio_data, orig_sr = sf.read(audio_file, dtype="int16")
-        print(
-            f"原始音频: 采样率={orig_sr}, 通道数="
-            f"{ref_audio_data.shape[1] if len(ref_audio_data.shape) > 1 else 1}"
-        )
-
-        # 转换为单声道(如果是立体声)
-        if len(ref_audio_data.shape) > 1 and ref_audio_data.shape[1] > 1:
-            ref_audio_data = ref_audio_data.mean(axis=1).astype(np.int16)
+        # 使用soundfile库读取原始音频：按文件信息预分配(帧数, 通道数)的int16缓冲区，
+        # 由libsndfile直接解码写入，省去一次中间数组分配
+        ref_info = sf.info(audio_file)
+        ref_buffer = np.empty((ref_info.frames, ref_info.channels), dtype=np.int16)
+        ref_audio_data, orig_sr = sf.read(audio_file, out=ref_buffer)
+        print(f"原始音频: 采样率={orig_sr}, 通道数={ref_info.channels}")
+
+        # 转换为单声道(如果是立体声)：用int32整数累加后求平均，不经过float64
+        if ref_audio_data.shape[1] == 1:
+            ref_audio_data = ref_audio_data[:, 0]
+        else:
+            ref_channels = ref_audio_data.shape[1]
+            mixed = ref_audio_data.sum(axis=1, dtype=np.int32)
+            # 求平均与转回int16在同一次遍历中完成，直接写入int16结果
+            mono = np.empty(len(mixed), dtype=np.int16)
+            if ref_channels & (ref_channels - 1) == 0:
+                # 通道数为2的幂时用移位代替除法
+                shift = ref_channels.bit_length() - 1
+                np.right_shift(mixed, shift, out=mono, casting="unsafe")
+            else:
+                np.floor_divide(mixed, ref_channels, out=mono, casting="unsafe")
+            ref_audio_data = mono
 
         # 转换采样率(如果需要)
         if orig_sr != SAMPLE_RATE:
             print(f"重采样参考音频从{orig_sr}Hz到{SAMPLE_RATE}Hz...")
-            # 使用librosa或scipy进行重采样
+            # 多相FIR滤波重采样，无需对整段音频做FFT，内存占用也小得多
             from scipy import signal
 
-            ref_audio_data = signal.resample(
-                ref_audio_data, int(len(ref_audio_data) * SAMPLE_RATE / orig_sr)
-            ).astype(np.int16)
-
-        # 保存为临时wav文件供pygame播放
-        temp_wav_path = os.path.join(current_dir, "temp_reference.wav")
-        with wave.open(temp_wav_path, "wb") as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)  # 2字节(16位)
-            wf.setframerate(SAMPLE_RATE)
-            wf.writeframes(ref_audio_data.tobytes())
-
-        # 将参考音频分成CHUNK大小的帧
-        ref_audio_frames = []
-        for i in range(0, len(ref_audio_data), CHUNK):
-            if i + CHUNK <= len(ref_audio_data):
-                ref_audio_frames.append(ref_audio_data[i : i + CHUNK])
-            else:
-                # 最后一帧不足CHUNK大小，补零
-                last_frame = np.zeros(CHUNK, dtype=np.int16)
-                last_frame[: len(ref_audio_data) - i] = ref_audio_data[i:]
-                ref_audio_frames.append(last_frame)
+            ref_audio_data = signal.resample_poly(ref_audio_data, SAMPLE_RATE, orig_sr)
+            # 滤波可能产生轻微过冲，截断到int16范围避免溢出回绕
+            ref_audio_data = np.clip(ref_audio_data, -32768, 32767).astype(np.int16)
 
-        print(f"参考音频准备完成，共{len(ref_audio_frames)}帧")
+        # 将参考音频分成CHUNK大小的帧：末尾补零后整体reshape，每行即一帧
+        n_ref_frames = -(-len(ref_audio_data) // CHUNK)
+        ref_audio_frames = np.pad(
+            ref_audio_data, (0, n_ref_frames * CHUNK - len(ref_audio_data))
+        ).reshape(n_ref_frames, CHUNK)
 
-        # 加载处理后的临时WAV文件
-        mixer.music.load(temp_wav_path)
+        print(f"参考音频准备完成，共{len(ref_audio_frames)}帧")
     except Exception as e:
         print(f"加载参考音频时出错: {e}")
         sys.exit(1)
 
+    # 扬声器输出流：回调直接逐帧播放内存中的参考音频，不再另存临时文件重新加载
+    playback_index = 0
+
+    def output_callback(outdata, frames, time_info, status):
+        nonlocal playback_index
+        if playback_index < len(ref_audio_frames):
+            outdata[:, 0] = ref_audio_frames[playback_index]
+            playback_index += 1
+        else:
+            outdata.fill(0)  # 参考音频播放完毕后输出静音
+
+    output_stream = sd.OutputStream(
+        samplerate=SAMPLE_RATE,
+        channels=CHANNELS,
+        dtype="int16",
+        blocksize=CHUNK,
+        latency="low",
+        callback=output_callback,
+    )
+
     # 创建WebRTC APM实例
     apm = apm_lib.WebRTC_APM_Create()
 
@@ -493,13 +588,15 @@ def aec_demo(audio_file):
     # 创建流配置
     stream_config = apm_lib.WebRTC_APM_CreateStreamConfig(SAMPLE_RATE, CHANNELS)
 
-    # 设置较小的延迟时间以更准确匹配参考信号和麦克风信号
-    apm_lib.WebRTC_APM_SetStreamDelayMs(apm, 50)
-
-    # 创建录音缓冲区
-    original_frames = []
-    processed_frames = []
-    reference_frames = []
+    # 按实际的输入/输出流延迟设置回声延迟，使参考信号与麦克风信号对齐
+    try:
+        stream_delay_ms = int(
+            round((input_stream.latency + output_stream.latency) * 1000)
+        )
+    except Exception:
+        stream_delay_ms = 50  # 无法获取流延迟时使用经验值
+    print(f"回声延迟: {stream_delay_ms}ms")
+    apm_lib.WebRTC_APM_SetStreamDelayMs(apm, stream_delay_ms)
 
     # 等待一会让音频系统准备好
     time.sleep(0.5)
@@ -507,69 +604,100 @@ def aec_demo(audio_file):
     print("开始录制和处理...")
     print("播放参考音频...")
 
-    mixer.music.play()
+    output_stream.start()
 
-    # 录制持续时间(根据音频文件长度)
-    try:
-        sound_length = mixer.Sound(temp_wav_path).get_length()
-        recording_time = sound_length if sound_length > 0 else 10
-    except Exception:
-        recording_time = 10  # 如果无法获取长度，默认10秒
+    # 录制持续时间(根据已加载的参考音频长度，无需再解码一次文件)
+    sound_length = len(ref_audio_data) / SAMPLE_RATE
+    recording_time = sound_length if sound_length > 0 else 10  # 无音频时默认10秒
 
     recording_time += 1  # 额外1秒确保捕获所有音频
 
+    # 按录制时长预分配录音缓冲区，逐帧按偏移写入，避免保存每帧的bytes对象
+    # （写入位置超出预分配长度时，bytearray的切片赋值会自动扩容）
+    frame_bytes = CHUNK * 2
+    buffer_size = int(recording_time * SAMPLE_RATE * 2) + frame_bytes
+    original_pcm = bytearray(buffer_size)
+    processed_pcm = bytearray(buffer_size)
+    reference_pcm = bytearray(buffer_size)
+    write_pos = 0
+
+    # 批处理缓冲区，在循环外一次性创建并反复复用
+    batch_samples = BATCH_FRAMES * CHUNK
+    input_block = np.zeros(batch_samples, dtype=np.int16)
+    output_block = np.zeros(batch_samples, dtype=np.int16)
+    # 参考音频剩余不足一批时的补零缓冲区
+    ref_block = np.zeros(batch_samples, dtype=np.int16)
+    # 参考信号的输出缓冲区（虽然不使用但必须提供）
+    ref_output_block = np.zeros(batch_samples, dtype=np.int16)
+    output_view = memoryview(output_block)
+    batch_frames = 0
+
+    # 参考音频各帧在内存中连续存放，批次直接取其中的一段视图，无需逐帧拷贝
+    ref_flat = ref_audio_frames.reshape(-1)
+    next_ref_frame = 0
+
+    def flush_batch(n_frames):
+        """
+        处理当前批次，并将参考帧和处理结果写入录音缓冲区.
+        """
+        nonlocal next_ref_frame
+        n_samples = n_frames * CHUNK
+
+        ref_start = next_ref_frame * CHUNK
+        ref_src = ref_flat[ref_start : ref_start + n_samples]
+        if len(ref_src) < n_samples:
+            # 参考音频已播放完毕或剩余不足一批，拷贝剩余部分并用静音补齐
+            ref_block[: len(ref_src)] = ref_src
+            ref_block[len(ref_src) : n_samples] = 0
+            ref_src = ref_block[:n_samples]
+        next_ref_frame += n_frames
+
+        result = process_aec_batch(
+            apm,
+            stream_config,
+            ref_src,
+            ref_output_block[:n_samples],
+            input_block[:n_samples],
+            output_block[:n_samples],
+            n_frames,
+        )
+        if result != 0:
+            print(f"\r警告: 处理失败，错误码: {result}")
+
+        # 本批次对应录音缓冲区中 write_pos 之前的 n_frames 帧
+        batch_start = write_pos - n_samples * 2
+        reference_pcm[batch_start:write_pos] = memoryview(ref_src)
+        processed_pcm[batch_start:write_pos] = output_view[:n_samples]
+
+    # 开始采集麦克风，主循环只从队列中取帧
+    input_stream.start()
+
     start_time = time.time()
-    current_ref_frame_index = 0
     try:
         while time.time() - start_time < recording_time:
-            # 从麦克风读取一帧数据
-            input_data = input_stream.read(CHUNK, exception_on_overflow=False)
+            # 从采集队列取出一帧麦克风数据
+            try:
+                input_data = capture_queue.get(timeout=1.0)
+            except queue.Empty:
+                print("\n警告: 麦克风采集已停止")
+                break
 
             # 保存原始录音
-            original_frames.append(input_data)
-
-            # 将输入数据转换为short数组
-            input_array = np.frombuffer(input_data, dtype=np.int16)
-            input_ptr = input_array.ctypes.data_as(POINTER(c_short))
+            frame_end = write_pos + frame_bytes
+            original_pcm[write_pos:frame_end] = input_data
 
-            # 获取当前参考音频帧
-            if current_ref_frame_index < len(ref_audio_frames):
-                ref_array = ref_audio_frames[current_ref_frame_index]
-                reference_frames.append(ref_array.tobytes())
-                current_ref_frame_index += 1
-            else:
-                # 如果参考音频播放完毕，使用静音帧
-                ref_array = np.zeros(CHUNK, dtype=np.int16)
-                reference_frames.append(ref_array.tobytes())
-
-            ref_ptr = ref_array.ctypes.data_as(POINTER(c_short))
-
-            # 创建输出缓冲区
-            output_array = np.zeros(CHUNK, dtype=np.int16)
-            output_ptr = output_array.ctypes.data_as(POINTER(c_short))
-
-            # 重要：先处理参考信号（扬声器输出）
-            # 创建参考信号的输出缓冲区（虽然不使用但必须提供）
-            ref_output_array = np.zeros(CHUNK, dtype=np.int16)
-            ref_output_ptr = ref_output_array.ctypes.data_as(POINTER(c_short))
-
-            result_reverse = apm_lib.WebRTC_APM_ProcessReverseStream(
-                apm, ref_ptr, stream_config, stream_config, ref_output_ptr
+            # 将麦克风帧放入批处理缓冲区，对应的参考帧在批处理时直接取用
+            offset = batch_frames * CHUNK
+            input_block[offset : offset + CHUNK] = np.frombuffer(
+                input_data, dtype=np.int16
             )
+            batch_frames += 1
+            write_pos = frame_end
 
-            if result_reverse != 0:
-                print(f"\r警告: 参考信号处理失败，错误码: {result_reverse}")
-
-            # 然后处理麦克风信号，应用回声消除
-            result = apm_lib.WebRTC_APM_ProcessStream(
-                apm, input_ptr, stream_config, stream_config, output_ptr
-            )
-
-            if result != 0:
-                print(f"\r警告: 处理失败，错误码: {result}")
-
-            # 保存处理后的音频帧
-            processed_frames.append(output_array.tobytes())
+            # 攒满一批后统一处理
+            if batch_frames == BATCH_FRAMES:
+                flush_batch(batch_frames)
+                batch_frames = 0
 
             # 计算并显示进度
             progress = (time.time() - start_time) / recording_time * 100
@@ -581,59 +709,63 @@ def aec_demo(audio_file):
     finally:
         print("\n录制和处理完成")
 
+        # 处理最后不足一批的剩余帧
+        if batch_frames:
+            flush_batch(batch_frames)
+
         # 停止播放
-        mixer.music.stop()
+        output_stream.stop()
+        output_stream.close()
 
         # 关闭音频流
-        input_stream.stop_stream()
+        input_stream.stop()
         input_stream.close()
 
         # 释放APM资源
         apm_lib.WebRTC_APM_DestroyStreamConfig(stream_config)
         apm_lib.WebRTC_APM_Destroy(apm)
 
-        # 关闭PyAudio
-        p.terminate()
-
         # 保存原始录音
         original_output_path = os.path.join(current_dir, "original_recording.wav")
-        save_wav(original_output_path, original_frames, SAMPLE_RATE, CHANNELS)
+        save_wav(
+            original_output_path,
+            memoryview(original_pcm)[:write_pos],
+            SAMPLE_RATE,
+            CHANNELS,
+        )
 
         # 保存处理后的录音
         processed_output_path = os.path.join(current_dir, "processed_recording.wav")
-        save_wav(processed_output_path, processed_frames, SAMPLE_RATE, CHANNELS)
+        save_wav(
+            processed_output_path,
+            memoryview(processed_pcm)[:write_pos],
+            SAMPLE_RATE,
+            CHANNELS,
+        )
 
         # 保存参考音频（播放的音频）
         reference_output_path = os.path.join(current_dir, "reference_playback.wav")
-        save_wav(reference_output_path, reference_frames, SAMPLE_RATE, CHANNELS)
-
-        # 删除临时文件
-        if os.path.exists(temp_wav_path):
-            try:
-                os.remove(temp_wav_path)
-            except Exception:
-                pass
+        save_wav(
+            reference_output_path,
+            memoryview(reference_pcm)[:write_pos],
+            SAMPLE_RATE,
+            CHANNELS,
+        )
 
         print(f"原始录音已保存至: {original_output_path}")
         print(f"处理后的录音已保存至: {processed_output_path}")
         print(f"参考音频已保存至: {reference_output_path}")
 
-        # 退出pygame
-        pygame.quit()
 
-
-def save_wav(file_path, frames, sample_rate, channels):
+def save_wav(file_path, data, sample_rate, channels):
     """
-    将音频帧保存为WAV文件.
+    将连续的PCM音频数据（bytes/bytearray/memoryview）保存为WAV文件.
     """
     with wave.open(file_path, "wb") as wf:
         wf.setnchannels(channels)
         wf.setsampwidth(2)  # 2字节(16位)
         wf.setframerate(sample_rate)
-        if isinstance(frames[0], bytes):
-            wf.writeframes(b"".join(frames))
-        else:
-            wf.writeframes(b"".join([f for f in frames if isinstance(f, bytes)]))
+        wf.writeframes(data)
 
 
 if __name__ == "__main__":
@@ -1,8 +1,8 @@
 import asyncio
+import logging
 import sys
-import threading
 from pathlib import Path
-from typing import Any, Awaitable
+from typing import Any, Awaitable, Callable
 
 # 允许作为脚本直接运行：把项目根目录加入 sys.path（src 的上一级）
 try:
@@ -32,15 +32,11 @@ setup_opus()
 
 class Application:
     _instance = None
-    _lock = threading.Lock()
 
     @classmethod
     def get_instance(cls):
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = Application()
-        return cls._instance
+        # __init__ 会将自身登记为 _instance，访问路径上无需加锁
+        return cls._instance or cls()
 
     def __init__(self):
         if Application._instance is not None:
@@ -69,8 +65,26 @@ class Application:
         )
         self.keep_listening = False
 
+        # JSON 消息分发表：(type, state) -> 处理函数
+        # 聆听模式在构造时已由 AEC 配置确定，TTS 开始的分支据此预先选定
+        self._json_handlers: dict[tuple[str, str], Callable[[], None]] = {
+            ("tts", "start"): (
+                self._on_tts_start_realtime
+                if self.aec_enabled
+                else self._on_tts_start_speaking
+            ),
+            ("tts", "stop"): self._on_tts_stop,
+        }
+
+        # 设备状态广播合并（同一轮事件循环只广播最终状态）
+        self._pending_state_broadcast: DeviceState | None = None
+        self._broadcast_task: asyncio.Task | None = None
+
         # 统一任务池（替代 _main_tasks/_bg_tasks）
         self._tasks: set[asyncio.Task] = set()
+        # 任务完成回调只绑定一次，所有任务共用，spawn 时不再逐个创建绑定方法
+        self._task_done_cb = self._on_task_done
+        self._task_discard_cb = self._tasks.discard
 
         # 关停事件
         self._shutdown_event: asyncio.Event | None = None
@@ -78,12 +92,20 @@ class Application:
         # 事件循环
         self._main_loop: asyncio.AbstractEventLoop | None = None
 
-        # 并发控制
-        self._state_lock: asyncio.Lock | None = None
-        self._connect_lock: asyncio.Lock | None = None
+        # 并发控制：连接中标志 + 连接结束事件
+        self._connecting = False
+        self._connected_event: asyncio.Event | None = None
 
-        # 插件
+        # 插件（热路径上使用预先绑定的通知方法）
         self.plugins = PluginManager()
+        self._notify_state = self.plugins.notify_device_state_changed
+        self._notify_json = self.plugins.notify_incoming_json
+        self._notify_audio = self.plugins.notify_incoming_audio
+
+        # 协议发送方法（设置协议后绑定）
+        self._send_start_listening = None
+        self._send_stop_listening = None
+        self._send_abort_speaking = None
 
     # -------------------------
     # 生命周期
@@ -135,48 +157,48 @@ class Application:
         """
         确保协议通道打开并广播一次协议就绪。返回是否已打开。
         """
-        # 已打开直接返回
+        # 快速路径：已打开直接返回
+        if self.is_audio_channel_opened():
+            return True
+        if self._connected_event is None:
+            # 异步对象未初始化时，直接尝试一次
+            return await self._open_audio_channel()
+        if self._connecting:
+            # 已有调用方在建立连接，等待其结束后复用结果
+            await self._connected_event.wait()
+            return self.is_audio_channel_opened()
+        self._connecting = True
+        self._connected_event.clear()
         try:
-            if self.is_audio_channel_opened():
-                return True
-            if not self._connect_lock:
-                # 未初始化锁时，直接尝试一次
-                opened = await asyncio.wait_for(
-                    self.protocol.open_audio_channel(), timeout=12.0
-                )
-                if not opened:
-                    logger.error("协议连接失败")
-                    return False
-                logger.info("协议连接已建立，按Ctrl+C退出")
-                await self.plugins.notify_protocol_connected(self.protocol)
-                return True
-
-            async with self._connect_lock:
-                if self.is_audio_channel_opened():
-                    return True
-                opened = await asyncio.wait_for(
-                    self.protocol.open_audio_channel(), timeout=12.0
-                )
-                if not opened:
-                    logger.error("协议连接失败")
-                    return False
-                logger.info("协议连接已建立，按Ctrl+C退出")
-                await self.plugins.notify_protocol_connected(self.protocol)
-                return True
+            return await self._open_audio_channel()
+        finally:
+            self._connecting = False
+            self._connected_event.set()
+
+    async def _open_audio_channel(self) -> bool:
+        try:
+            opened = await asyncio.wait_for(
+                self.protocol.open_audio_channel(), timeout=12.0
+            )
         except asyncio.TimeoutError:
             logger.error("协议连接超时")
             return False
+        if not opened:
+            logger.error("协议连接失败")
+            return False
+        logger.info("协议连接已建立，按Ctrl+C退出")
+        await self.plugins.notify_protocol_connected(self.protocol)
+        return True
 
     def _initialize_async_objects(self) -> None:
         logger.debug("初始化异步对象")
         self._shutdown_event = asyncio.Event()
-        self._state_lock = asyncio.Lock()
-        self._connect_lock = asyncio.Lock()
+        self._connected_event = asyncio.Event()
 
     def _set_protocol(self, protocol_type: str) -> None:
         logger.debug("设置协议类型: %s", protocol_type)
         if protocol_type == "mqtt":
-            self.protocol = MqttProtocol(asyncio.get_running_loop())
+            self.protocol = MqttProtocol(self._main_loop)
         else:
             self.protocol = WebsocketProtocol()
 
@@ -185,24 +207,25 @@ class Application:
     # -------------------------
     async def start_listening_manual(self) -> None:
         try:
-            ok = await self.connect_protocol()
-            if not ok:
-                return
+            # 通道已打开时不进入 connect_protocol，避免无谓的协程调度
+            if not self.is_audio_channel_opened():
+                if not await self.connect_protocol():
+                    return
             self.keep_listening = False
 
             # 如果说话中发送打断
             if self.device_state == DeviceState.SPEAKING:
                 logger.info("说话中发送打断")
-                await self.protocol.send_abort_speaking(None)
+                await self._send_abort_speaking(None)
                 await self.set_device_state(DeviceState.IDLE)
-            await self.protocol.send_start_listening(ListeningMode.MANUAL)
+            await self._send_start_listening(ListeningMode.MANUAL)
             await self.set_device_state(DeviceState.LISTENING)
         except Exception:
             pass
 
     async def stop_listening_manual(self) -> None:
         try:
-            await self.protocol.send_stop_listening()
+            await self._send_stop_listening()
             await self.set_device_state(DeviceState.IDLE)
         except Exception:
             pass
@@ -212,21 +235,27 @@ class Application:
     # -------------------------
     async def start_auto_conversation(self) -> None:
         try:
-            ok = await self.connect_protocol()
-            if not ok:
-                return
+            # 通道已打开时不进入 connect_protocol，避免无谓的协程调度
+            if not self.is_audio_channel_opened():
+                if not await self.connect_protocol():
+                    return
 
             mode = (
                 ListeningMode.REALTIME if self.aec_enabled else ListeningMode.AUTO_STOP
             )
             self.listening_mode = mode
             self.keep_listening = True
-            await self.protocol.send_start_listening(mode)
+            await self._send_start_listening(mode)
             await self.set_device_state(DeviceState.LISTENING)
         except Exception:
             pass
 
     def _setup_protocol_callbacks(self) -> None:
+        # 会话内协议实例固定，预先绑定常用的发送方法
+        self._send_start_listening = self.protocol.send_start_listening
+        self._send_stop_listening = self.protocol.send_stop_listening
+        self._send_abort_speaking = self.protocol.send_abort_speaking
+
         self.protocol.on_network_error(self._on_network_error)
         self.protocol.on_incoming_json(self._on_incoming_json)
         self.protocol.on_incoming_audio(self._on_incoming_audio)
@@ -244,18 +273,37 @@ class Application:
         创建任务并登记，关停时统一取消。
         """
         if not self.running or (self._shutdown_event and self._shutdown_event.is_set()):
-            logger.debug(f"跳过任务创建（应用正在关闭）: {name}")
+            logger.debug("跳过任务创建（应用正在关闭）: %s", name)
+            # 关闭未调度的协程，避免 "never awaited" 警告
+            if asyncio.iscoroutine(coro):
+                coro.close()
             return None
         task = asyncio.create_task(coro, name=name)
         self._tasks.add(task)
+        task.add_done_callback(self._task_done_cb)
+        return task
 
-        def _done(t: asyncio.Task):
-            self._tasks.discard(t)
-            if not t.cancelled() and t.exception():
-                logger.error(f"任务 {name} 异常结束: {t.exception()}", exc_info=True)
+    def _fire_and_forget(self, coro: Awaitable[Any], name: str) -> None:
+        """
+        轻量的 UI/状态更新任务：协程内部已吞掉异常，省去异常日志回调。
 
-        task.add_done_callback(_done)
-        return task
+        仍登记到任务池以保持强引用，关停时照常取消。
+        """
+        if not self.running or (self._shutdown_event and self._shutdown_event.is_set()):
+            logger.debug("跳过任务创建（应用正在关闭）: %s", name)
+            coro.close()
+            return
+        task = asyncio.create_task(coro, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_discard_cb)
+
+    def _on_task_done(self, t: asyncio.Task) -> None:
+        # 任务池需保持强引用：事件循环只弱引用任务，未完成的任务可能被回收
+        self._tasks.discard(t)
+        if not t.cancelled() and t.exception():
+            logger.error(
+                f"任务 {t.get_name()} 异常结束: {t.exception()}", exc_info=True
+            )
 
     def schedule_command_nowait(self, fn, *args, **kwargs) -> None:
         """简化的“立即调度”：把任意可调用丢回主loop执行。
@@ -278,6 +326,26 @@ class Application:
         # 确保在事件循环线程里执行
         self._main_loop.call_soon_threadsafe(_runner)
 
+    def schedule_sync_nowait(self, fn, *args) -> None:
+        """把同步可调用直接丢回主loop执行（无包装闭包与协程判断）。
+
+        异常由事件循环的异常处理器记录。
+        """
+        if not self._main_loop or self._main_loop.is_closed():
+            logger.warning("主事件循环未就绪，拒绝调度")
+            return
+        self._main_loop.call_soon_threadsafe(fn, *args)
+
+    def schedule_coro_nowait(self, coro_fn, *args) -> None:
+        """把协程函数丢回主loop创建子任务执行，任务照常登记到任务池。"""
+        if not self._main_loop or self._main_loop.is_closed():
+            logger.warning("主事件循环未就绪，拒绝调度")
+            return
+        self._main_loop.call_soon_threadsafe(self._spawn_call, coro_fn, args)
+
+    def _spawn_call(self, coro_fn, args) -> None:
+        self.spawn(coro_fn(*args), name=f"call:{getattr(coro_fn, '__name__', 'anon')}")
+
     # -------------------------
     # 协议回调
     # -------------------------
@@ -291,97 +359,113 @@ class Application:
         #     self._shutdown_event.set()
 
     def _on_incoming_audio(self, data: bytes):
-        logger.debug(f"收到二进制消息，长度: {len(data)}")
+        # 逐帧调用：未开启 DEBUG 时连参数也不计算
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("收到二进制消息，长度: %d", len(data))
+        # 音频帧频率高，无订阅插件时不创建转发任务
+        if not self.plugins.has_audio_subscribers():
+            return
         # 转发给插件
-        self.spawn(self.plugins.notify_incoming_audio(data), "plugin:on_audio")
+        self.spawn(self._notify_audio(data), "plugin:on_audio")
 
     def _on_incoming_json(self, json_data):
         try:
             msg_type = json_data.get("type") if isinstance(json_data, dict) else None
-            logger.info(f"收到JSON消息: type={msg_type}")
+            logger.info("收到JSON消息: type=%s", msg_type)
             # 将 TTS start/stop 映射为设备状态（支持自动/实时，且不污染手动模式）
             if msg_type == "tts":
+                # state 可能是任意 JSON 值，非字符串（如 dict/list）不可作为键查表
                 state = json_data.get("state")
-                if state == "start":
-                    # 仅当保持会话且实时模式时，TTS开始期间保持LISTENING；否则显示SPEAKING
-                    if (
-                        self.keep_listening
-                        and self.listening_mode == ListeningMode.REALTIME
-                    ):
-                        self.spawn(
-                            self.set_device_state(DeviceState.LISTENING),
-                            "state:tts_start_rt",
-                        )
-                    else:
-                        self.spawn(
-                            self.set_device_state(DeviceState.SPEAKING),
-                            "state:tts_start_speaking",
-                        )
-                elif state == "stop":
-                    if self.keep_listening:
-                        # 继续对话：根据当前模式重启监听
-                        async def _restart_listening():
-                            try:
-                                # REALTIME 且已在 LISTENING 时无需重复发送
-                                if not (
-                                    self.listening_mode == ListeningMode.REALTIME
-                                    and self.device_state == DeviceState.LISTENING
-                                ):
-                                    await self.protocol.send_start_listening(
-                                        self.listening_mode
-                                    )
-                            except Exception:
-                                pass
-                            self.keep_listening and await self.set_device_state(
-                                DeviceState.LISTENING
-                            )
-
-                        self.spawn(_restart_listening(), "state:tts_stop_restart")
-                    else:
-                        self.spawn(
-                            self.set_device_state(DeviceState.IDLE),
-                            "state:tts_stop_idle",
-                        )
-            # 转发给插件
-            self.spawn(self.plugins.notify_incoming_json(json_data), "plugin:on_json")
+                handler = isinstance(state, str) and self._json_handlers.get(
+                    (msg_type, state)
+                )
+                if handler:
+                    handler()
+            # 转发给插件（无订阅插件时不创建转发任务）
+            if self.plugins.has_json_subscribers():
+                self.spawn(self._notify_json(json_data), "plugin:on_json")
         except Exception:
             logger.info("收到JSON消息")
 
+    def _on_tts_start_realtime(self):
+        # 实时模式：仅当保持会话时，TTS开始期间保持LISTENING；否则显示SPEAKING
+        if self.keep_listening:
+            self._fire_and_forget(
+                self.set_device_state(DeviceState.LISTENING), "state:tts_start_rt"
+            )
+        else:
+            self._on_tts_start_speaking()
+
+    def _on_tts_start_speaking(self):
+        self._fire_and_forget(
+            self.set_device_state(DeviceState.SPEAKING), "state:tts_start_speaking"
+        )
+
+    def _on_tts_stop(self):
+        if self.keep_listening:
+            # 继续对话：根据当前模式重启监听
+            self._fire_and_forget(self._restart_listening(), "state:tts_stop_restart")
+        else:
+            self._fire_and_forget(
+                self.set_device_state(DeviceState.IDLE), "state:tts_stop_idle"
+            )
+
+    async def _restart_listening(self):
+        try:
+            # REALTIME（即开启 AEC）且已在 LISTENING 时无需重复发送
+            if not (self.aec_enabled and self.device_state == DeviceState.LISTENING):
+                await self._send_start_listening(self.listening_mode)
+        except Exception:
+            pass
+        self.keep_listening and await self.set_device_state(DeviceState.LISTENING)
+
     async def _on_audio_channel_opened(self):
         logger.info("协议通道已打开")
-        # 通道打开后进入 LISTENING（：简化为直读直写）
-        await self.set_device_state(DeviceState.LISTENING)
+        # 通道打开后进入 LISTENING（：简化为直读直写）；重连时多已处于该状态
+        if self.device_state != DeviceState.LISTENING:
+            await self.set_device_state(DeviceState.LISTENING)
 
     async def _on_audio_channel_closed(self):
         logger.info("协议通道已关闭")
         # 通道关闭回到 IDLE
-        await self.set_device_state(DeviceState.IDLE)
+        if self.device_state != DeviceState.IDLE:
+            await self.set_device_state(DeviceState.IDLE)
 
     async def set_device_state(self, state: DeviceState):
         """
         仅供主程序内部调用：设置设备状态。插件请只读获取。
         """
-        # print(f"set_device_state: {state}")
-        if not self._state_lock:
-            self.device_state = state
-            try:
-                await self.plugins.notify_device_state_changed(state)
-            except Exception:
-                pass
+        # 只有主程序在事件循环线程里改写状态，单写者下无需加锁
+        if self.device_state == state:
             return
-        async with self._state_lock:
-            if self.device_state == state:
-                return
-            logger.info(f"设置设备状态: {state}")
-            self.device_state = state
-        # 锁外广播，避免插件回调引起潜在的长耗时阻塞
+        logger.info("设置设备状态: %s", state)
+        self.device_state = state
+        self._schedule_state_broadcast(state)
+        if state == DeviceState.LISTENING:
+            await asyncio.sleep(0.5)
+            self.aborted = False
+
+    def _schedule_state_broadcast(self, state: DeviceState) -> None:
+        """
+        记录最新状态，由唯一的广播任务按顺序推送给插件。
+
+        广播任务在下一轮事件循环才开始执行，同一轮内的多次变更只广播最终状态。
+        """
+        self._pending_state_broadcast = state
+        if self._broadcast_task is None:
+            self._broadcast_task = self.spawn(
+                self._drain_state_broadcasts(), "plugin:on_state"
+            )
+
+    async def _drain_state_broadcasts(self) -> None:
         try:
-            await self.plugins.notify_device_state_changed(state)
-            if state == DeviceState.LISTENING:
-                await asyncio.sleep(0.5)
-                self.aborted = False
-        except Exception:
-            pass
+            # 广播期间若又有新状态，继续推送，直到没有待广播的状态
+            while self._pending_state_broadcast is not None:
+                state = self._pending_state_broadcast
+                self._pending_state_broadcast = None
+                await self._notify_state(state)
+        finally:
+            self._broadcast_task = None
 
     # -------------------------
     # 只读访问器（提供给插件使用）
@@ -405,10 +489,8 @@ class Application:
         return bool(self.keep_listening)
 
     def is_audio_channel_opened(self) -> bool:
-        try:
-            return bool(self.protocol and self.protocol.is_audio_channel_opened())
-        except Exception:
-            return False
+        # 各协议实现自行兜底异常，这里无需 try/except
+        return self.protocol is not None and self.protocol.is_audio_channel_opened()
 
     def get_state_snapshot(self) -> dict:
         return {
@@ -429,7 +511,7 @@ class Application:
 
         logger.info(f"中止语音输出，原因: {reason}")
         self.aborted = True
-        await self.protocol.send_abort_speaking(reason)
+        await self._send_abort_speaking(reason)
         await self.set_device_state(DeviceState.IDLE)
 
     # -------------------------
@@ -445,14 +527,14 @@ class Application:
             msg_type = "tts"
         payload = {"type": msg_type, "text": message}
         # 通过插件事件总线异步派发
-        self.spawn(self.plugins.notify_incoming_json(payload), "ui:text_update")
+        self._fire_and_forget(self._notify_json(payload), "ui:text_update")
 
     def set_emotion(self, emotion: str) -> None:
         """
         设置情绪表情：通过 UIPlugin 的 on_incoming_json 路由。
         """
         payload = {"type": "llm", "emotion": emotion}
-        self.spawn(self.plugins.notify_incoming_json(payload), "ui:emotion_update")
+        self._fire_and_forget(self._notify_json(payload), "ui:emotion_update")
 
     # -------------------------
     # 关停
@@ -467,24 +549,26 @@ class Application:
             self._shutdown_event.set()
 
         try:
-            # 取消所有登记任务
-            if self._tasks:
-                for t in list(self._tasks):
-                    if not t.done():
-                        t.cancel()
-                await asyncio.gather(*self._tasks, return_exceptions=True)
-                self._tasks.clear()
-
-            # 关闭协议（限时，避免阻塞退出）
+            # 先关闭协议（限时，避免阻塞退出），让在途任务能看到通道关闭
             if self.protocol:
                 try:
-                    try:
-                        self._main_loop.create_task(self.protocol.close_audio_channel())
-                    except asyncio.TimeoutError:
-                        logger.warning("关闭协议超时，跳过等待")
+                    await asyncio.wait_for(
+                        self.protocol.close_audio_channel(), timeout=3.0
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning("关闭协议超时，跳过等待")
                 except Exception as e:
                     logger.error(f"关闭协议失败: {e}")
 
+            # 取消所有登记任务：先统一取消，再一次性等待全部结束
+            # （对已完成的任务 cancel 为空操作，无需逐个判断）
+            if self._tasks:
+                tasks = tuple(self._tasks)
+                self._tasks.clear()
+                for t in tasks:
+                    t.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
             # 插件：stop/shutdown
             try:
                 await self.plugins.stop_all()
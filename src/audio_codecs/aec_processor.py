@@ -293,29 +293,31 @@ class AECProcessor:
             return capture_audio
 
         try:
-            # 仅在macOS导入ctypes
-            import ctypes
-
             # 获取参考信号
             reference_audio = self._get_reference_frame(self._webrtc_frame_size)
 
-            # 创建ctypes缓冲区
-            capture_buffer = (ctypes.c_short * self._webrtc_frame_size)(*capture_audio)
-            reference_buffer = (ctypes.c_short * self._webrtc_frame_size)(
-                *reference_audio
-            )
+            # 直接传入numpy缓冲区，避免逐帧构造ctypes数组
+            capture_buffer = np.ascontiguousarray(capture_audio, dtype=np.int16)
+            reference_buffer = np.ascontiguousarray(reference_audio, dtype=np.int16)
 
-            processed_capture = (ctypes.c_short * self._webrtc_frame_size)()
-            processed_reference = (ctypes.c_short * self._webrtc_frame_size)()
+            processed_capture = np.empty(self._webrtc_frame_size, dtype=np.int16)
 
-            # 首先处理参考信号（render stream）
-            render_result = self.apm.process_reverse_stream(
-                reference_buffer,
-                self.render_config,
-                self.render_config,
-                processed_reference,
+            # 参考信号的处理结果不再使用，输出缓冲区从帧缓冲池复用
+            processed_reference = self.apm.acquire_frame(
+                AudioConfig.INPUT_SAMPLE_RATE, AudioConfig.CHANNELS
             )
 
+            # 首先处理参考信号（render stream）
+            try:
+                render_result = self.apm.process_reverse_stream(
+                    reference_buffer,
+                    self.render_config,
+                    self.render_config,
+                    processed_reference,
+                )
+            finally:
+                self.apm.release_frame(processed_reference)
+
             if render_result != 0:
                 logger.warning(f"参考信号处理失败，错误码: {render_result}")
 
@@ -331,8 +333,7 @@ class AECProcessor:
                 logger.warning(f"采集信号处理失败，错误码: {capture_result}")
                 return capture_audio
 
-            # 转换回numpy数组
-            return np.array(processed_capture, dtype=np.int16)
+            return processed_capture
 
         except Exception as e:
             logger.error(f"AEC帧处理失败: {e}")
@@ -35,6 +35,8 @@ class CalendarDatabase:
 
     def __init__(self):
         self.db_file = DATABASE_FILE
+        # 数据修订号，每次有写入的连接关闭时递增，供上层缓存判断是否失效
+        self.revision = 0
         self._ensure_database()
 
     def _ensure_database(self):
@@ -104,8 +106,26 @@ class CalendarDatabase:
             raise
         finally:
             if conn:
+                if conn.total_changes:
+                    self.revision += 1
                 conn.close()
 
+    def data_version(self) -> tuple:
+        """
+        数据版本标识，供上层缓存判断是否失效.
+
+        由本进程的修订号与数据库文件头的变更计数器组成：SQLite 在回滚日志模式下
+        每次提交写事务都会递增文件头偏移24处的计数器，因此其他进程
+        （如 scripts/calendar_query.py 或另一个客户端）的写入同样能被发现。
+        """
+        try:
+            with open(self.db_file, "rb") as f:
+                f.seek(24)
+                change_counter = f.read(4)
+        except OSError:
+            change_counter = b""
+        return self.revision, change_counter
+
     def add_event(self, event_data: Dict[str, Any]) -> bool:
         """
         添加事件.
@@ -182,6 +202,30 @@ class CalendarDatabase:
             logger.error(f"获取事件失败: {e}")
             return []
 
+    def search_events(self, keyword: str) -> List[Dict[str, Any]]:
+        """
+        按关键词搜索事件（标题、备注、分类，不区分大小写）.
+        """
+        # 转义LIKE通配符，保证关键词按字面匹配；LIKE 本身对ASCII不区分大小写
+        escaped = keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.execute(
+                    """
+                    SELECT * FROM events
+                    WHERE title LIKE ? ESCAPE '\\'
+                    OR description LIKE ? ESCAPE '\\'
+                    OR category LIKE ? ESCAPE '\\'
+                    ORDER BY start_time
+                    """,
+                    (pattern, pattern, pattern),
+                )
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"搜索事件失败: {e}")
+            return []
+
     def update_event(self, event_id: str, **kwargs) -> bool:
         """
         更新事件.
@@ -388,6 +432,20 @@ class CalendarDatabase:
             logger.error(f"获取分类失败: {e}")
             return ["默认"]
 
+    def get_category_counts(self) -> Dict[str, int]:
+        """
+        一次聚合查询统计各分类的事件数量.
+        """
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.execute(
+                    "SELECT category, COUNT(*) FROM events GROUP BY category"
+                )
+                return dict(cursor.fetchall())
+        except Exception as e:
+            logger.error(f"统计分类事件数量失败: {e}")
+            return {}
+
     def add_category(self, category_name: str) -> bool:
         """
         添加新分类.
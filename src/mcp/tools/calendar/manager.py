@@ -2,8 +2,11 @@
 日程管理器 负责日程数据的存储、查询、更新等核心功能.
 """
 
+import copy
 import os
-from typing import List
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List
 
 from src.utils.logging_config import get_logger
 
@@ -12,6 +15,25 @@ from .models import CalendarEvent
 
 logger = get_logger(__name__)
 
+# 区间查询缓存的最大条目数
+_RANGE_CACHE_SIZE = 64
+
+
+def _is_cacheable_bound(value: str) -> bool:
+    """
+    区间边界是否适合作为缓存键.
+
+    按整分钟对齐的边界（如当天零点）会被重复查询；带秒或微秒的边界通常取自
+    当前时间，每次调用都不同，缓存只会堆积无用条目。
+    """
+    if not value:
+        return True
+    try:
+        bound = datetime.fromisoformat(value)
+    except ValueError:
+        return False
+    return bound.second == 0 and bound.microsecond == 0
+
 
 class CalendarManager:
     """
@@ -20,6 +42,9 @@ class CalendarManager:
 
     def __init__(self):
         self.db = get_calendar_database()
+        # 区间查询缓存: (start_date, end_date, category) -> 事件列表
+        self._range_cache: OrderedDict = OrderedDict()
+        self._range_cache_version = self.db.data_version()
         # 尝试从旧的JSON文件迁移数据
         self._migrate_from_json_if_exists()
 
@@ -309,13 +334,45 @@ class CalendarManager:
         """
         获取事件列表.
         """
+        # 任何写入（包括提醒服务与其他进程）都会使缓存整体失效
+        version = self.db.data_version()
+        if self._range_cache_version != version:
+            self._range_cache.clear()
+            self._range_cache_version = version
+
+        cacheable = _is_cacheable_bound(start_date) and _is_cacheable_bound(end_date)
+        key = (start_date or None, end_date or None, category or None)
+        cached = self._range_cache.get(key) if cacheable else None
+        if cached is not None:
+            self._range_cache.move_to_end(key)
+            # 返回副本，调用方修改事件不会污染缓存
+            return [copy.copy(event) for event in cached]
+
         try:
             events_data = self.db.get_events(start_date, end_date, category)
-            return [CalendarEvent.from_dict(event_data) for event_data in events_data]
+            events = [CalendarEvent.from_dict(event_data) for event_data in events_data]
         except Exception as e:
             logger.error(f"获取日程失败: {e}")
             return []
 
+        if not cacheable:
+            return events
+        self._range_cache[key] = events
+        if len(self._range_cache) > _RANGE_CACHE_SIZE:
+            self._range_cache.popitem(last=False)
+        return [copy.copy(event) for event in events]
+
+    def search(self, keyword: str) -> List[CalendarEvent]:
+        """
+        按关键词搜索事件.
+        """
+        try:
+            events_data = self.db.search_events(keyword)
+            return [CalendarEvent.from_dict(event_data) for event_data in events_data]
+        except Exception as e:
+            logger.error(f"搜索日程失败: {e}")
+            return []
+
     def update_event(self, event_id: str, **kwargs) -> bool:
         """
         更新事件.
@@ -346,6 +403,12 @@ class CalendarManager:
         """
         return self.db.get_categories()
 
+    def get_category_counts(self) -> Dict[str, int]:
+        """
+        获取各分类的事件数量.
+        """
+        return self.db.get_category_counts()
+
 
 # 全局管理器实例
 _calendar_manager = None
@@ -2,11 +2,20 @@
 日程管理数据模型.
 """
 
+import functools
 import uuid
 from datetime import datetime
 from typing import Any, Dict
 
 
+@functools.lru_cache(maxsize=1024)
+def _parse_iso(value: str) -> datetime:
+    """
+    解析ISO格式时间字符串，相同字符串只解析一次.
+    """
+    return datetime.fromisoformat(value)
+
+
 class CalendarEvent:
     """
     日程事件数据模型.
@@ -34,6 +43,20 @@ class CalendarEvent:
         self.created_at = datetime.now().isoformat()
         self.updated_at = datetime.now().isoformat()
 
+    @property
+    def start_dt(self) -> datetime:
+        """
+        开始时间的datetime对象.
+        """
+        return _parse_iso(self.start_time)
+
+    @property
+    def end_dt(self) -> datetime:
+        """
+        结束时间的datetime对象.
+        """
+        return _parse_iso(self.end_time)
+
     def to_dict(self) -> Dict[str, Any]:
         """
         转换为字典.
@@ -79,8 +102,7 @@ class CalendarEvent:
         try:
             from datetime import timedelta
 
-            start_dt = datetime.fromisoformat(self.start_time)
-            reminder_dt = start_dt - timedelta(minutes=self.reminder_minutes)
+            reminder_dt = self.start_dt - timedelta(minutes=self.reminder_minutes)
             return reminder_dt.isoformat()
         except Exception:
             return self.start_time  # 如果计算失败，返回开始时间
@@ -55,10 +55,6 @@ class AudioPlugin(Plugin):
             except Exception:
                 pass
 
-    async def on_incoming_json(self, message: Any) -> None:
-        # 示例：不处理
-        await asyncio.sleep(0)
-
     async def on_incoming_audio(self, data: bytes) -> None:
         if self.codec:
             try:
@@ -3,6 +3,13 @@ from typing import Any, List
 from .base import Plugin
 
 
+def _overrides(plugin: Plugin, hook: str) -> bool:
+    """
+    插件是否覆写了基类的某个钩子（基类实现均为空操作）。
+    """
+    return getattr(type(plugin), hook) is not getattr(Plugin, hook)
+
+
 class PluginManager:
     """
     轻量插件管理器：统一setup/start/stop/shutdown广播；错误隔离。
@@ -11,11 +18,19 @@ class PluginManager:
     def __init__(self) -> None:
         self._plugins: List[Plugin] = []
         self._by_name: dict[str, Plugin] = {}
+        # 覆写了 on_incoming_json/on_incoming_audio 的插件
+        # 消息与音频为高频事件，只分发给真正的订阅者
+        self._json_plugins: List[Plugin] = []
+        self._audio_plugins: List[Plugin] = []
 
     def register(self, *plugins: Plugin) -> None:
         for p in plugins:
             if p not in self._plugins:
                 self._plugins.append(p)
+                if _overrides(p, "on_incoming_json"):
+                    self._json_plugins.append(p)
+                if _overrides(p, "on_incoming_audio"):
+                    self._audio_plugins.append(p)
                 try:
                     name = getattr(p, "name", None)
                     if isinstance(name, str) and name:
@@ -32,6 +47,18 @@ class PluginManager:
         except Exception:
             return None
 
+    def has_json_subscribers(self) -> bool:
+        """
+        是否存在处理JSON消息的插件。
+        """
+        return bool(self._json_plugins)
+
+    def has_audio_subscribers(self) -> bool:
+        """
+        是否存在处理音频数据的插件。
+        """
+        return bool(self._audio_plugins)
+
     async def setup_all(self, app: Any) -> None:
         for p in list(self._plugins):
             try:
@@ -55,14 +82,14 @@ class PluginManager:
                 pass
 
     async def notify_incoming_json(self, message: Any) -> None:
-        for p in list(self._plugins):
+        for p in list(self._json_plugins):
             try:
                 await p.on_incoming_json(message)
             except Exception:
                 pass
 
     async def notify_incoming_audio(self, data: bytes) -> None:
-        for p in list(self._plugins):
+        for p in list(self._audio_plugins):
             try:
                 await p.on_incoming_audio(data)
             except Exception: